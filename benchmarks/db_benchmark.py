@@ -0,0 +1,77 @@
+"""
+Database write benchmark.
+
+Simulates concurrent jobs writing status updates of their videos and reports
+write throughput for each database url.
+
+    python benchmarks/db_benchmark.py --jobs 20 --updates 200 \
+        "sqlite://{tmp}/default.sqlite3?journal_mode=DELETE&synchronous=FULL" \
+        "sqlite://{tmp}/tuned.sqlite3"
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from tortoise import Tortoise  # noqa: E402
+
+from contextly.db import TORTOISE_ORM, get_connection  # noqa: E402
+from contextly.models.media import Media  # noqa: E402
+
+DEFAULT_URLS = [
+    "sqlite://{tmp}/default.sqlite3?journal_mode=DELETE&synchronous=FULL",
+    "sqlite://{tmp}/tuned.sqlite3",
+]
+
+
+async def run_job(media: Media, updates: int) -> None:
+    """
+    Write status updates of a media, like the progress hook of a job.
+    """
+
+    for i in range(updates):
+        await Media.filter(id=media.id).update(status=f"downloading-{i}%")
+
+
+async def benchmark(db_url: str, jobs: int, updates: int) -> float:
+    """
+    Run concurrent jobs against a database.
+
+    :return: (float) writes per second
+    """
+
+    config = {**TORTOISE_ORM, "connections": {"default": get_connection(db_url)}}
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    try:
+        media = [
+            await Media.create(source_id=f"youtube:{i}", url=f"https://youtu.be/{i}")
+            for i in range(jobs)
+        ]
+        start = time.perf_counter()
+        await asyncio.gather(*(run_job(item, updates) for item in media))
+        return jobs * updates / (time.perf_counter() - start)
+    finally:
+        await Tortoise._drop_databases()
+
+
+async def main(urls: list, jobs: int, updates: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        for url in urls:
+            url = url.format(tmp=tmp)
+            throughput = await benchmark(url, jobs, updates)
+            print(f"{url}: {throughput:.0f} writes/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("urls", nargs="*", default=DEFAULT_URLS)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--updates", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.urls, args.jobs, args.updates))
@@ -0,0 +1,113 @@
+"""
+Login storm benchmark.
+
+Fires concurrent logins at the application while another client keeps
+requesting the main page, and reports login throughput and the latency
+of the unrelated requests.
+
+    python benchmarks/login_benchmark.py --logins 200 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("DB_URL", "sqlite://:memory:")
+sys.path.append(str(Path(__file__).parent.parent))
+
+from asgi_lifespan import LifespanManager  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from contextly.main import app  # noqa: E402
+
+USER = {
+    "username": "bench",
+    "email": "bench@test.ru",
+    "password": "bench",
+    "confirm_password": "bench",
+}
+
+
+def percentile(values: list, q: float) -> float:
+    """
+    Get a percentile of the values.
+
+    :param values: (list) measured values
+    :param q: (float) percentile, 0-100
+    :return: (float)
+    """
+
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q / 100))]
+
+
+async def login_storm(client: AsyncClient, logins: int, concurrency: int) -> list:
+    """
+    Log in `logins` times with `concurrency` parallel clients.
+
+    :return: (list) status codes of the logins
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+    data = {"username": USER["username"], "password": USER["password"]}
+
+    async def login():
+        async with semaphore:
+            response = await client.post("/user/login", data=data)
+            return response.status_code
+
+    return await asyncio.gather(*(login() for _ in range(logins)))
+
+
+async def probe(client: AsyncClient, stop: asyncio.Event) -> list:
+    """
+    Request the main page every 10 ms until stopped. Latency is counted from
+    the scheduled start, so time spent waiting for a blocked event loop is included.
+
+    :return: (list) request latencies in seconds
+    """
+
+    latencies = []
+    scheduled = time.perf_counter()
+    while not stop.is_set():
+        await client.get("/")
+        latencies.append(time.perf_counter() - scheduled)
+        scheduled += 0.01
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+    return latencies
+
+
+async def main(logins: int, concurrency: int) -> None:
+    async with LifespanManager(app) as manager:
+        transport = ASGITransport(app=manager.app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.post("/user/register", data=USER)
+            stop = asyncio.Event()
+            probe_task = asyncio.create_task(probe(client, stop))
+            start = time.perf_counter()
+            codes = await login_storm(client, logins, concurrency)
+            elapsed = time.perf_counter() - start
+            stop.set()
+            latencies = await probe_task
+
+    print(f"logins: {logins}, concurrency: {concurrency}, time: {elapsed:.2f}s")
+    print(f"login throughput: {logins / elapsed:.1f}/s")
+    print(f"login status codes: { {code: codes.count(code) for code in set(codes)} }")
+    print(
+        f"main page: {len(latencies)} requests, "
+        f"median {statistics.median(latencies) * 1000:.1f} ms, "
+        f"p99 {percentile(latencies, 99) * 1000:.1f} ms, "
+        f"max {max(latencies) * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency))
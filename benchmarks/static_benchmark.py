@@ -0,0 +1,147 @@
+"""
+Static files benchmark.
+
+Serves a large generated video through a local uvicorn server and reports
+full download throughput, latency of random `Range` requests (seeking)
+and of conditional `If-None-Match` revalidations, for each stream chunk size.
+
+    python benchmarks/static_benchmark.py --size 256 --clients 4 \
+        --chunk-sizes 65536 1048576
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("DB_URL", "sqlite://:memory:")
+sys.path.append(str(Path(__file__).parent.parent))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from contextly.main import app  # noqa: E402
+from contextly.routers.static import StaticFileResponse  # noqa: E402
+
+
+def percentile(values: list, q: float) -> float:
+    """
+    Get a percentile of the values.
+
+    :param values: (list) measured values
+    :param q: (float) percentile, 0-100
+    :return: (float)
+    """
+
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q / 100))]
+
+
+def report(name: str, latencies: list) -> None:
+    """
+    Print the median and p99 of request latencies.
+    """
+
+    print(
+        f"  {name}: {len(latencies)} requests, "
+        f"median {statistics.median(latencies) * 1000:.1f} ms, "
+        f"p99 {percentile(latencies, 99) * 1000:.1f} ms"
+    )
+
+
+async def download(client: httpx.AsyncClient, url: str) -> int:
+    """
+    Download a whole file.
+
+    :return: (int) number of received bytes
+    """
+
+    received = 0
+    async with client.stream("GET", url) as response:
+        async for chunk in response.aiter_raw():
+            received += len(chunk)
+    return received
+
+
+async def timed(request) -> float:
+    """
+    Measure the latency of a request.
+
+    :return: (float) latency in seconds
+    """
+
+    start = time.perf_counter()
+    await request
+    return time.perf_counter() - start
+
+
+async def run(base_url: str, id: str, size: int, clients: int, requests: int) -> None:
+    """
+    Download the file with concurrent clients, then seek and revalidate it.
+    """
+
+    url = f"{base_url}/static/video/{id}"
+    async with httpx.AsyncClient(timeout=None) as client:
+        start = time.perf_counter()
+        received = await asyncio.gather(
+            *(download(client, url) for _ in range(clients))
+        )
+        elapsed = time.perf_counter() - start
+        print(f"  full download: {sum(received) / elapsed / 2**20:.0f} MiB/s")
+
+        def seek():
+            offset = random.randrange(size - 2**20)
+            headers = {"Range": f"bytes={offset}-{offset + 2**20 - 1}"}
+            return client.get(url, headers=headers)
+
+        report("1 MiB range", [await timed(seek()) for _ in range(requests)])
+        etag = (await client.head(url)).headers["etag"]
+        revalidate = [
+            await timed(client.get(url, headers={"If-None-Match": etag}))
+            for _ in range(requests)
+        ]
+        report("304 revalidation", revalidate)
+
+
+async def main(size_mb: int, clients: int, requests: int, chunk_sizes: list) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        id = str(uuid.uuid4())
+        path = Path(f"downloads/{id}/video/{id}.mp4")
+        path.parent.mkdir(parents=True)
+        size = size_mb * 2**20
+        with open(path, "wb") as file:
+            for _ in range(size_mb):
+                file.write(os.urandom(2**20))
+
+        config = uvicorn.Config(app, port=8765, log_level="warning")
+        server = uvicorn.Server(config)
+        task = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+        try:
+            for chunk_size in chunk_sizes:
+                StaticFileResponse.chunk_size = chunk_size
+                print(f"chunk size {chunk_size} bytes, file {size_mb} MiB:")
+                await run("http://127.0.0.1:8765", id, size, clients, requests)
+        finally:
+            server.should_exit = True
+            await task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=256, help="file size, MiB")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument(
+        "--chunk-sizes", type=int, nargs="+", default=[64 * 1024, 1024 * 1024]
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.size, args.clients, args.requests, args.chunk_sizes))
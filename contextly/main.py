@@ -8,7 +8,11 @@ from contextly.db import TORTOISE_ORM
 from contextly.routers.static import router as static_router
 from contextly.routers.user import router as user_router
 from contextly.routers.video import router as video_router
-from contextly.settings import templates
+from contextly.settings import PRELOAD_MODELS, templates
+from contextly.utils.disk import disk_collector
+from contextly.utils.jobs import job_queue
+from contextly.utils.registry import registry
+from contextly.utils.youtubedl import YouTubeDl
 
 
 @asynccontextmanager
@@ -19,7 +23,14 @@ async def lifespan(app: FastAPI):
         generate_schemas=True,
         add_exception_handlers=True,
     ):
+        if PRELOAD_MODELS:
+            await registry.load_all()
+        await job_queue.resume(YouTubeDl().download_video_with_async_hook)
+        disk_collector.start()
         yield
+        await disk_collector.stop()
+        await job_queue.shutdown()
+        registry.close()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -0,0 +1,21 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "transcript_blocks" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "index" INT NOT NULL,
+    "start" REAL NOT NULL,
+    "end" REAL NOT NULL,
+    "segments" INT NOT NULL,
+    "compression" VARCHAR(16) NOT NULL  DEFAULT 'none',
+    "data" BLOB NOT NULL,
+    "video_id" CHAR(36) NOT NULL REFERENCES "videos" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_transcript__video_i_6303db" UNIQUE ("video_id", "index")
+);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "transcript_blocks";"""
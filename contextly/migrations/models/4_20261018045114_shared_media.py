@@ -0,0 +1,166 @@
+"""
+Share the media of a video between the users who added it.
+
+Every video becomes a media keyed by `get_source_id` of its url, so different
+urls of one YouTube video are merged into one media with a reference per user.
+Like the other migrations of this folder it is written for SQLite, which has
+no `ALTER TABLE ... DROP COLUMN` with constraints and rebuilds the tables;
+a PostgreSQL database is created from the models with `aerich init-db`
+in a migrations folder of its own.
+"""
+
+from pypika import Table
+from tortoise import BaseDBAsyncClient
+
+from contextly.utils.media import get_source_id
+
+
+async def merge_media(db: BaseDBAsyncClient) -> None:
+    """
+    Normalize the media copied from the videos to their source id and canonical
+    url, and merge the media of the same source. The transcript of a done media
+    is kept, and a user keeps one video of each media.
+
+    :param db: (BaseDBAsyncClient) connection of the migration
+    :return: None
+    """
+
+    media, videos = Table("media"), Table("videos_new")
+    rows = await db.execute_query_dict(
+        'SELECT "id", "url", "user_id", "status" FROM "videos" '
+        'ORDER BY "created_at", "id"'
+    )
+    sources = {}
+    for row in rows:
+        sources.setdefault(get_source_id(row["url"]), []).append(row)
+    for (source_id, url), group in sources.items():
+        kept = next((row for row in group if row["status"] == "done"), group[0])
+        users, merged, duplicates = set(), [], []
+        for row in [kept] + [row for row in group if row is not kept]:
+            if row["user_id"] in users:
+                duplicates.append(row["id"])
+            elif row is not kept:
+                merged.append(row["id"])
+            users.add(row["user_id"])
+        queries = [
+            db.query_class.update(media)
+            .set(media.source_id, source_id)
+            .set(media.url, url)
+            .set(media.refs, len(users))
+            .where(media.id == kept["id"])
+        ]
+        if duplicates:
+            queries.append(
+                db.query_class.from_(videos).delete().where(videos.id.isin(duplicates))
+            )
+        if merged:
+            queries.append(
+                db.query_class.update(videos)
+                .set(videos.media_id, kept["id"])
+                .where(videos.id.isin(merged))
+            )
+        if merged or duplicates:
+            queries.append(
+                db.query_class.from_(media)
+                .delete()
+                .where(media.id.isin(merged + duplicates))
+            )
+        for query in queries:
+            await db.execute_query(query.get_sql())
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    await db.execute_script(
+        """
+        CREATE TABLE IF NOT EXISTS "media" (
+    "id" CHAR(36) NOT NULL  PRIMARY KEY,
+    "source_id" VARCHAR(2048) NOT NULL UNIQUE,
+    "url" VARCHAR(2048) NOT NULL,
+    "title" VARCHAR(2048) NOT NULL  DEFAULT '',
+    "description" TEXT NOT NULL,
+    "text" TEXT NOT NULL,
+    "status" VARCHAR(128) NOT NULL  DEFAULT 'create',
+    "audio_chunks" INT NOT NULL  DEFAULT 0,
+    "download_policy" VARCHAR(32) NOT NULL  DEFAULT 'full',
+    "refs" INT NOT NULL  DEFAULT 0,
+    "created_at" TIMESTAMP NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMP NOT NULL  DEFAULT CURRENT_TIMESTAMP
+);
+        INSERT INTO "media" ("id", "source_id", "url", "title", "description", "text", "status", "audio_chunks", "download_policy", "refs", "created_at", "updated_at")
+            SELECT "id", "id", "url", "title", "description", "text", "status", "audio_chunks", "download_policy", 1, "created_at", "updated_at" FROM "videos";
+        CREATE TABLE "videos_new" (
+    "id" CHAR(36) NOT NULL  PRIMARY KEY,
+    "url" VARCHAR(2048) NOT NULL,
+    "created_at" TIMESTAMP NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMP NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "media_id" CHAR(36) NOT NULL REFERENCES "media" ("id") ON DELETE CASCADE,
+    "user_id" INT NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_videos_user_id_c7755a" UNIQUE ("user_id", "media_id")
+);
+        INSERT INTO "videos_new" ("id", "url", "created_at", "updated_at", "media_id", "user_id")
+            SELECT "id", "url", "created_at", "updated_at", "id", "user_id" FROM "videos";"""
+    )
+    await merge_media(db)
+    return """
+        CREATE TABLE "transcript_blocks_new" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "index" INT NOT NULL,
+    "start" REAL NOT NULL,
+    "end" REAL NOT NULL,
+    "segments" INT NOT NULL,
+    "compression" VARCHAR(16) NOT NULL  DEFAULT 'none',
+    "data" BLOB NOT NULL,
+    "media_id" CHAR(36) NOT NULL REFERENCES "media" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_transcript__media_i_485093" UNIQUE ("media_id", "index")
+);
+        INSERT INTO "transcript_blocks_new" ("id", "index", "start", "end", "segments", "compression", "data", "media_id")
+            SELECT "id", "index", "start", "end", "segments", "compression", "data", "video_id" FROM "transcript_blocks"
+            WHERE "video_id" IN (SELECT "id" FROM "media");
+        DROP TABLE "transcript_blocks";
+        ALTER TABLE "transcript_blocks_new" RENAME TO "transcript_blocks";
+        DROP TABLE "videos";
+        ALTER TABLE "videos_new" RENAME TO "videos";
+        CREATE INDEX IF NOT EXISTS "idx_videos_user_id_07fef3" ON "videos" ("user_id", "created_at");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE "videos_old" (
+    "id" CHAR(36) NOT NULL  PRIMARY KEY,
+    "url" VARCHAR(2048) NOT NULL UNIQUE,
+    "title" VARCHAR(2048) NOT NULL  DEFAULT '',
+    "description" TEXT NOT NULL,
+    "text" TEXT NOT NULL,
+    "status" VARCHAR(128) NOT NULL  DEFAULT 'create',
+    "audio_chunks" INT NOT NULL  DEFAULT 0,
+    "created_at" TIMESTAMP NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMP NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "user_id" INT NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE,
+    "download_policy" VARCHAR(32) NOT NULL  DEFAULT 'full'
+);
+        INSERT OR IGNORE INTO "videos_old" ("id", "url", "title", "description", "text", "status", "audio_chunks", "created_at", "updated_at", "user_id", "download_policy")
+            SELECT "v"."id", "v"."url", "m"."title", "m"."description", "m"."text", "m"."status", "m"."audio_chunks", "v"."created_at", "v"."updated_at", "v"."user_id", "m"."download_policy"
+            FROM "videos" "v" JOIN "media" "m" ON "m"."id" = "v"."media_id";
+        CREATE TABLE "transcript_blocks_old" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "index" INT NOT NULL,
+    "start" REAL NOT NULL,
+    "end" REAL NOT NULL,
+    "segments" INT NOT NULL,
+    "compression" VARCHAR(16) NOT NULL  DEFAULT 'none',
+    "data" BLOB NOT NULL,
+    "video_id" CHAR(36) NOT NULL REFERENCES "videos_old" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_transcript__video_i_6303db" UNIQUE ("video_id", "index")
+);
+        INSERT INTO "transcript_blocks_old" ("id", "index", "start", "end", "segments", "compression", "data", "video_id")
+            SELECT * FROM (
+                SELECT "t"."id", "t"."index", "t"."start", "t"."end", "t"."segments", "t"."compression", "t"."data",
+                    (SELECT MIN("o"."id") FROM "videos_old" "o" JOIN "videos" "v" ON "v"."id" = "o"."id" WHERE "v"."media_id" = "t"."media_id") AS "video_id"
+                FROM "transcript_blocks" "t"
+            ) WHERE "video_id" IS NOT NULL;
+        DROP TABLE "transcript_blocks";
+        DROP TABLE "videos";
+        DROP TABLE "media";
+        ALTER TABLE "videos_old" RENAME TO "videos";
+        ALTER TABLE "transcript_blocks_old" RENAME TO "transcript_blocks";
+        CREATE INDEX IF NOT EXISTS "idx_videos_user_id_07fef3" ON "videos" ("user_id", "created_at");"""
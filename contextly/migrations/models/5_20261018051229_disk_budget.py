@@ -0,0 +1,13 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "media" ADD "evicted" INT NOT NULL  DEFAULT 0;
+        ALTER TABLE "media" ADD "viewed_at" TIMESTAMP;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "media" DROP COLUMN "evicted";
+        ALTER TABLE "media" DROP COLUMN "viewed_at";"""
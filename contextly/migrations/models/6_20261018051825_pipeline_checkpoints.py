@@ -0,0 +1,21 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "media" ADD "checkpoint" VARCHAR(32) NOT NULL  DEFAULT '';
+        UPDATE "media" SET "checkpoint" = 'summarize' WHERE "status" = 'done';
+        CREATE TABLE IF NOT EXISTS "transcript_chunks" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "index" INT NOT NULL,
+    "compression" VARCHAR(16) NOT NULL  DEFAULT 'none',
+    "data" BLOB NOT NULL,
+    "media_id" CHAR(36) NOT NULL REFERENCES "media" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_transcript__media_i_85686d" UNIQUE ("media_id", "index")
+);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "media" DROP COLUMN "checkpoint";
+        DROP TABLE IF EXISTS "transcript_chunks";"""
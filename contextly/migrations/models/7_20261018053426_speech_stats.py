@@ -0,0 +1,13 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "media" ADD "audio_seconds" REAL NOT NULL  DEFAULT 0;
+        ALTER TABLE "media" ADD "speech_seconds" REAL;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "media" DROP COLUMN "audio_seconds";
+        ALTER TABLE "media" DROP COLUMN "speech_seconds";"""
@@ -0,0 +1,60 @@
+"""
+Move the transcripts saved as text before segments were stored
+into a single transcript block, and drop the text column of the media.
+"""
+
+import json
+
+from pypika import Table
+from tortoise import BaseDBAsyncClient
+
+
+async def move_legacy_text(db: BaseDBAsyncClient) -> None:
+    """
+    Save the text of every media without transcript blocks as one block
+    of one segment without timestamps.
+
+    :param db: (BaseDBAsyncClient) connection of the migration
+    :return: None
+    """
+
+    blocks = Table("transcript_blocks")
+    rows = await db.execute_query_dict(
+        'SELECT "id", "text" FROM "media" WHERE "text" != \'\' '
+        'AND "id" NOT IN (SELECT "media_id" FROM "transcript_blocks")'
+    )
+    for row in rows:
+        segments = [{"start": 0.0, "end": 0.0, "text": row["text"]}]
+        query = (
+            db.query_class.into(blocks)
+            .columns(
+                blocks.index,
+                blocks.start,
+                blocks.end,
+                blocks.segments,
+                blocks.compression,
+                blocks.data,
+                blocks.media_id,
+            )
+            .insert(
+                0,
+                0.0,
+                0.0,
+                1,
+                "none",
+                json.dumps(segments, ensure_ascii=False),
+                row["id"],
+            )
+        )
+        await db.execute_query(query.get_sql())
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    await move_legacy_text(db)
+    return """
+        ALTER TABLE "media" DROP COLUMN "text";"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "media" ADD "text" TEXT NOT NULL  DEFAULT '';"""
@@ -0,0 +1,30 @@
+from uuid import UUID, uuid4
+
+from tortoise import fields
+from tortoise.models import Model
+
+
+class Media(Model):
+    id: UUID = fields.UUIDField(primary_key=True, default=uuid4)
+    source_id: str = fields.CharField(max_length=2048, unique=True)  # youtube:<id>
+    url: str = fields.CharField(max_length=2048)  # canonical url
+    title: str = fields.CharField(max_length=2048, default="")
+    description: str = fields.TextField(default="")
+    status: str = fields.CharField(max_length=128, default="create")
+    checkpoint: str = fields.CharField(max_length=32, default="")  # last finished stage
+    audio_chunks: int = fields.IntField(default=0)
+    audio_seconds: float = fields.FloatField(default=0)  # audio checked by the VAD
+    speech_seconds = fields.FloatField(null=True)  # part sent to Whisper, None no VAD
+    download_policy: str = fields.CharField(max_length=32, default="full")
+    refs: int = fields.IntField(default=0)  # number of videos of users
+    evicted: bool = fields.BooleanField(default=False)  # files removed by the collector
+    viewed_at = fields.DatetimeField(null=True)  # last opening of the video page
+
+    created_at = fields.DatetimeField(auto_now_add=True)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source_id}-{self.title}"
+
+    class Meta:
+        table = "media"
@@ -0,0 +1,45 @@
+from tortoise import fields
+from tortoise.models import Model
+
+from contextly.models.media import Media
+
+
+class TranscriptBlock(Model):
+    id: int = fields.IntField(primary_key=True)
+    media: fields.ForeignKeyRelation[Media] = fields.ForeignKeyField(
+        model_name="models.Media",
+        related_name="transcript_blocks",
+        on_delete=fields.CASCADE,
+    )
+    index: int = fields.IntField()  # block number, also the transcript page
+    start: float = fields.FloatField()  # start of the first segment, seconds
+    end: float = fields.FloatField()  # end of the last segment, seconds
+    segments: int = fields.IntField()  # number of segments in the block
+    compression: str = fields.CharField(max_length=16, default="none")
+    data: bytes = fields.BinaryField()  # JSON list of segments
+
+    def __str__(self):
+        return f"{self.media_id}-{self.index}"
+
+    class Meta:
+        table = "transcript_blocks"
+        unique_together = (("media", "index"),)
+
+
+class TranscriptChunk(Model):
+    id: int = fields.IntField(primary_key=True)
+    media: fields.ForeignKeyRelation[Media] = fields.ForeignKeyField(
+        model_name="models.Media",
+        related_name="transcript_chunks",
+        on_delete=fields.CASCADE,
+    )
+    index: int = fields.IntField()  # audio chunk number
+    compression: str = fields.CharField(max_length=16, default="none")
+    data: bytes = fields.BinaryField()  # JSON list of segments
+
+    def __str__(self):
+        return f"{self.media_id}-{self.index}"
+
+    class Meta:
+        table = "transcript_chunks"
+        unique_together = (("media", "index"),)
@@ -1,64 +1,421 @@
+import asyncio
+import mimetypes
+import os
 import uuid
-from pathlib import Path
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+import ffmpeg
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import (FileResponse, RedirectResponse, Response,
+                               StreamingResponse)
+from starlette.staticfiles import NotModifiedResponse
+
+from contextly.models.media import Media
+from contextly.settings import (S3_PRESIGN, S3_PRESIGN_EXPIRES,
+                                STATIC_CACHE_MAX_AGE, STATIC_CHUNK_SIZE,
+                                THUMBNAIL_CACHE_BYTES, THUMBNAIL_CACHE_DIR,
+                                THUMBNAIL_QUALITY, THUMBNAIL_SIZES, logger)
+from contextly.utils.audio import concat_audio, copy_audio
+from contextly.utils.storage import storage
+from contextly.utils.thumbnails import (THUMBNAIL_FORMATS, ThumbnailCache,
+                                        negotiate_format, resize_image)
 
 router = APIRouter(prefix="/static", tags=["static"])
 
+HLS_MEDIA_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".m4s": "video/iso.segment",
+    ".mp4": "video/mp4",
+}
+IMAGE_MEDIA_TYPES = {  # thumbnails written by yt-dlp, preferred first
+    ".webp": "image/webp",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+}
+AUDIO_MEDIA_TYPES = {
+    ".m4a": "audio/mp4",
+    ".mp3": "audio/mpeg",
+    ".webm": "audio/webm",
+    ".opus": "audio/ogg",
+}
+
+audio_builds: Dict[str, asyncio.Task] = {}  # media id -> running audio build
+thumbnail_cache = ThumbnailCache(THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_BYTES)
+
+
+class StaticFileResponse(FileResponse):
+    """
+    File response streaming in larger chunks than the Starlette default.
+    `Range`/`If-Range` requests are answered with 206 partial content by `FileResponse`.
+    """
+
+    chunk_size = STATIC_CHUNK_SIZE
+
+
+def is_not_modified(request: Request, response: Response) -> bool:
+    """
+    Check the conditional headers of a request against the validators of a response.
+    `If-None-Match` takes precedence over `If-Modified-Since`.
+
+    :param request: (Request) The HTTP request object.
+    :param response: (Response) The response with `ETag` and `Last-Modified` headers.
+    :return: (bool) True if 304 Not Modified can be sent instead of the file.
+    """
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or response.headers["etag"] in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+        last_modified = parsedate_to_datetime(response.headers["last-modified"])
+    except (TypeError, ValueError):
+        return False
+    return last_modified <= since
+
+
+async def file_response(
+    request: Request, path: Path, detail: str, media_type: Optional[str] = None
+) -> Response:
+    """
+    Serve a downloaded file with validators and long-lived caching.
+    Files under a media id never change, so they are cached as immutable.
+
+    :param request: (Request) The HTTP request object.
+    :param path: (Path) Path of the file.
+    :param detail: (str) Error message if the file is not found.
+    :param media_type: (Optional[str]) Content type, guessed from the name by default.
+    :return: Response: The file, a part of it, or 304 Not Modified.
+    """
+
+    try:
+        stat_result = await asyncio.to_thread(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=detail)
+    response = StaticFileResponse(
+        path,
+        stat_result=stat_result,
+        media_type=media_type,
+        headers={"Cache-Control": f"public, max-age={STATIC_CACHE_MAX_AGE}, immutable"},
+    )
+    if is_not_modified(request, response):
+        return NotModifiedResponse(response.headers)
+    return response
+
+
+def parse_range(request: Request, etag: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range of a request. Multiple ranges, and ranges of a request
+    whose `If-Range` doesn't match the current file, are answered with the whole file.
+
+    :param request: (Request) The HTTP request object.
+    :param etag: (str) `ETag` of the file.
+    :param size: (int) Size of the file in bytes.
+    :return: (Optional[Tuple[int, int]]) first and last byte, None for the whole file
+    """
+
+    header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if not header or (if_range is not None and if_range != etag):
+        return None
+    unit, _, ranges = header.partition("=")
+    if unit.strip() != "bytes" or "," in ranges:
+        return None
+    start, _, end = ranges.strip().partition("-")
+    try:
+        if start:
+            start, end = int(start), min(int(end), size - 1) if end else size - 1
+        else:
+            start, end = max(size - int(end), 0), size - 1
+    except ValueError:
+        return None
+    if start > end:
+        raise HTTPException(
+            status_code=416, headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+
+async def object_response(
+    request: Request, key: str, detail: str, media_type: str
+) -> Response:
+    """
+    Stream an object of the remote storage through the API,
+    with the same validators, ranges and caching as local files.
+
+    :param request: (Request) The HTTP request object.
+    :param key: (str) Key of the object.
+    :param detail: (str) Error message if the object is not found.
+    :param media_type: (str) Content type.
+    :return: Response: The object, a part of it, or 304 Not Modified.
+    """
+
+    stat = await storage.stat(key)
+    if stat is None:
+        raise HTTPException(status_code=404, detail=detail)
+    size = stat["ContentLength"]
+    headers = {
+        "accept-ranges": "bytes",
+        "etag": stat["ETag"],
+        "last-modified": formatdate(stat["LastModified"].timestamp(), usegmt=True),
+        "cache-control": f"public, max-age={STATIC_CACHE_MAX_AGE}, immutable",
+    }
+    response = Response(headers=headers, media_type=media_type)
+    if is_not_modified(request, response):
+        return NotModifiedResponse(response.headers)
+
+    byte_range = parse_range(request, headers["etag"], size)
+    status_code, start, end = 200, 0, size - 1
+    if byte_range:
+        status_code, (start, end) = 206, byte_range
+        headers["content-range"] = f"bytes {start}-{end}/{size}"
+    headers["content-length"] = str(end - start + 1)
+    if request.method == "HEAD":
+        return Response(headers=headers, media_type=media_type, status_code=status_code)
+    body = await asyncio.to_thread(
+        storage.open, key, f"bytes={start}-{end}" if byte_range else None
+    )
+    return StreamingResponse(
+        body.iter_chunks(STATIC_CHUNK_SIZE), status_code, headers, media_type
+    )
+
+
+async def stored_response(
+    request: Request, key: str, detail: str, media_type: Optional[str] = None
+) -> Response:
+    """
+    Serve a stored media artifact.
+    Local files are served from disk. Objects of a remote storage are redirected
+    to a presigned URL, so the bucket serves them, or streamed through the API.
+
+    :param request: (Request) The HTTP request object.
+    :param key: (str) Key of the artifact, e.g. `{id}/video/{id}.mp4`.
+    :param detail: (str) Error message if the artifact is not found.
+    :param media_type: (Optional[str]) Content type, guessed from the key by default.
+    :return: Response: The artifact, a part of it, 304 Not Modified or a redirect.
+    """
+
+    media_type = media_type or mimetypes.guess_type(key)[0]
+    if not storage.remote:
+        path = Path(storage.local_path(key))
+        return await file_response(request, path, detail, media_type)
+    media_type = media_type or "application/octet-stream"
+    if S3_PRESIGN:
+        return RedirectResponse(
+            storage.presigned_url(key, media_type, S3_PRESIGN_EXPIRES),
+            status_code=307,
+            headers={"Cache-Control": f"private, max-age={S3_PRESIGN_EXPIRES // 2}"},
+        )
+    return await object_response(request, key, detail, media_type)
+
+
+async def find_thumbnail(id: str) -> Optional[str]:
+    """
+    Find the original thumbnail of a media, whichever format yt-dlp saved it in.
+
+    :param id: (str) A unique identifier for the thumbnail.
+    :return: (Optional[str]) key of the thumbnail if it exists
+    """
+
+    keys = await storage.list(f"{id}/img")
+    for suffix in IMAGE_MEDIA_TYPES:
+        if f"{id}/img/{id}{suffix}" in keys:
+            return f"{id}/img/{id}{suffix}"
+    return None
+
 
-@router.get("/thumbnail/{id}", include_in_schema=False)
-async def thumbnail(id: str):
+@router.api_route("/thumbnail/{id}", methods=["GET", "HEAD"], include_in_schema=False)
+async def thumbnail(request: Request, id: str, size: Optional[str] = None):
     """
      Retrieve a thumbnail image by its ID.
+    With `size` a scaled-down variant is generated on first request and kept in
+    the thumbnail cache, in the best format the client accepts.
 
+    :param request: (Request) The HTTP request object.
     :param id: (str) A unique identifier for the thumbnail.
+    :param size: (Optional[str]) variant name from `THUMBNAIL_SIZES`, the original
+        image by default
     :return: FileResponse: The thumbnail file if it exists.
         HTTPException: A 404 error if the thumbnail is not found or the ID is invalid.
 
     """
     try:
-        thumbnail_path = Path(f"downloads/{uuid.UUID(id)}/img/{id}.webp")
-        if thumbnail_path.exists():
-            return FileResponse(thumbnail_path)
-        raise HTTPException(status_code=404, detail="Thumbnail not found")
+        id = str(uuid.UUID(id))
     except ValueError:
         raise HTTPException(status_code=404, detail="Thumbnail not found")
+    if size is not None and size not in THUMBNAIL_SIZES:
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    source_key = await find_thumbnail(id)
+    if source_key is None:
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    if size is None:
+        media_type = IMAGE_MEDIA_TYPES[PurePosixPath(source_key).suffix]
+        return await stored_response(
+            request, source_key, "Thumbnail not found", media_type
+        )
 
+    media_type = negotiate_format(request.headers.get("accept"))
+    name = f"{id}-{size}{THUMBNAIL_FORMATS[media_type][1]}"
+    path = await asyncio.to_thread(thumbnail_cache.get, name)
+    if path is None:
+        source_path = await storage.fetch(source_key)
+        if source_path is None:
+            raise HTTPException(status_code=404, detail="Thumbnail not found")
+        try:
+            data = await asyncio.to_thread(
+                resize_image,
+                source_path,
+                THUMBNAIL_SIZES[size],
+                media_type,
+                THUMBNAIL_QUALITY,
+            )
+        except (OSError, ValueError) as e:
+            logger.error(f"Thumbnail resize error {id}: {e}")
+            raise HTTPException(status_code=404, detail="Thumbnail not found")
+        path = await asyncio.to_thread(thumbnail_cache.put, name, data)
+    response = await file_response(request, path, "Thumbnail not found", media_type)
+    response.headers["Vary"] = "Accept"
+    return response
 
-@router.get("/video/{id}", include_in_schema=False)
-async def video(id: str):
+
+@router.api_route("/video/{id}", methods=["GET", "HEAD"], include_in_schema=False)
+async def video(request: Request, id: str):
     """
      Retrieve a video file by its ID.
 
+    :param request: (Request) The HTTP request object.
     :param id: (str) A unique identifier for the video.
     :return: FileResponse: The video file if it exists.
         HTTPException: A 404 error if the video is not found or the ID is invalid.
 
     """
     try:
-        video_path = Path(f"downloads/{uuid.UUID(id)}/video/{id}.mp4")
-        if video_path.exists():
-            return FileResponse(video_path)
-        raise HTTPException(status_code=404, detail="Video not found")
+        id = str(uuid.UUID(id))
     except ValueError:
         raise HTTPException(status_code=404, detail="Video not found")
+    key = f"{id}/video/{id}.mp4"
+    return await stored_response(request, key, "Video not found", "video/mp4")
+
+
+@router.api_route(
+    "/hls/{id}/{path:path}", methods=["GET", "HEAD"], include_in_schema=False
+)
+async def hls(request: Request, id: str, path: str):
+    """
+     Retrieve an HLS playlist or segment of a video.
+    The stream is published complete, so its files are cached like the video.
+
+    :param request: (Request) The HTTP request object.
+    :param id: (str) A unique identifier for the video.
+    :param path: (str) Path of the file in the stream, e.g. `master.m3u8`.
+    :return: FileResponse: The playlist or segment if it exists.
+        HTTPException: A 404 error if the file is not found or the path is invalid.
 
+    """
+    file_path = PurePosixPath(path)
+    media_type = HLS_MEDIA_TYPES.get(file_path.suffix)
+    try:
+        id = str(uuid.UUID(id))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    if media_type is None or file_path.is_absolute() or ".." in file_path.parts:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    key = f"{id}/hls/{file_path}"
+    return await stored_response(request, key, "Stream not found", media_type)
+
+
+async def find_audio(id: str) -> Tuple[Optional[str], List[str]]:
+    """
+    Find the full-length audio of a media, or the files it can be built from.
+
+    The audio stream downloaded by the `audio_first` and `audio_only` policies
+    is served as it is. Otherwise the audio track is copied from the video,
+    or the MP3 chunks written for transcription are joined.
+
+    :param id: (str) A unique identifier for the audio.
+    :return: (Tuple[Optional[str], List[str]]) key of the audio if it exists,
+        else keys of the existing sources to build it from
+    """
 
-@router.get("/audio/{id}", include_in_schema=False)
-async def audio(id: str):
+    keys = await storage.list(f"{id}/audio")
+    paths = [PurePosixPath(key) for key in keys]
+    for stem in (id, "full"):
+        for path in paths:
+            if path.stem == stem and path.suffix in AUDIO_MEDIA_TYPES:
+                return str(path), []
+    video_key = f"{id}/video/{id}.mp4"
+    if await storage.exists(video_key):
+        return None, [video_key]
+    chunks = [path for path in paths if path.suffix == ".mp3" and path.stem.isdigit()]
+    return None, [str(path) for path in sorted(chunks, key=lambda p: int(p.stem))]
+
+
+async def build_audio(id: str, sources: List[str]) -> str:
+    """
+    Build the full-length audio of a media once, without re-encoding.
+
+    :param id: (str) A unique identifier for the audio.
+    :param sources: (List[str]) keys of the video, or of the MP3 chunks in order
+    :return: (str) key of the built audio
     """
-     Retrieve an audio file by its ID.
 
+    paths = await asyncio.gather(*map(storage.fetch, sources))
+    if None in paths:
+        raise FileNotFoundError(f"Audio sources not found: {id}")
+    if sources[0].endswith(".mp4"):
+        audio_key = f"{id}/audio/full.m4a"
+        build, source = copy_audio, paths[0]
+    else:
+        audio_key = f"{id}/audio/full.mp3"
+        build, source = concat_audio, paths
+    audio_path = storage.local_path(audio_key)
+    await asyncio.to_thread(os.makedirs, os.path.dirname(audio_path), exist_ok=True)
+    await asyncio.to_thread(build, source, audio_path)
+    await storage.upload(audio_key)
+    logger.info(f"Saved: {audio_path}")
+    return audio_key
+
+
+@router.api_route("/audio/{id}", methods=["GET", "HEAD"], include_in_schema=False)
+async def audio(request: Request, id: str):
+    """
+     Retrieve the full-length audio of a video by its ID.
+    On first request the audio is built without re-encoding, and concurrent
+    requests wait for the same build. MP3 chunks are only joined when all of them
+    are written.
+
+    :param request: (Request) The HTTP request object.
     :param id: (str) A unique identifier for the audio.
     :return: FileResponse: The audio file if it exists.
         HTTPException: A 404 error if the audio is not found or the ID is invalid.
 
     """
     try:
-        audio_path = Path(f"downloads/{uuid.UUID(id)}/audio/0.mp3")
-        if audio_path.exists():
-            return FileResponse(audio_path)
-        raise HTTPException(status_code=404, detail="Audio not found")
+        id = str(uuid.UUID(id))
     except ValueError:
         raise HTTPException(status_code=404, detail="Audio not found")
+    audio_key, sources = await find_audio(id)
+    if audio_key is None:
+        if not sources:
+            raise HTTPException(status_code=404, detail="Audio not found")
+        if sources[0].endswith(".mp3"):
+            chunks = await Media.filter(id=id).values_list("audio_chunks", flat=True)
+            if not chunks or chunks[0] != len(sources):
+                raise HTTPException(status_code=404, detail="Audio not found")
+        if id not in audio_builds:
+            task = asyncio.create_task(build_audio(id, sources))
+            task.add_done_callback(lambda _: audio_builds.pop(id, None))
+            audio_builds[id] = task
+        try:
+            audio_key = await asyncio.shield(audio_builds[id])
+        except (ffmpeg.Error, FileNotFoundError) as e:
+            logger.error(f"Audio build error {id}: {getattr(e, 'stderr', e)}")
+            raise HTTPException(status_code=404, detail="Audio not found")
+    media_type = AUDIO_MEDIA_TYPES[PurePosixPath(audio_key).suffix]
+    return await stored_response(request, audio_key, "Audio not found", media_type)
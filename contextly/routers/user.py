@@ -6,8 +6,8 @@ from fastapi.responses import HTMLResponse, RedirectResponse
 
 from contextly.models.user import User
 from contextly.settings import ACCESS_TOKEN_EXPIRE_MINUTES, logger, templates
-from contextly.utils.auth import (create_access_token, get_password_hash,
-                                  verify_password)
+from contextly.utils.auth import (create_access_token, hashing_pool,
+                                  session_cache)
 
 router = APIRouter(prefix="/user", tags=["user"])
 
@@ -81,8 +81,9 @@ async def register_post(
         return templates.TemplateResponse(
             request, "register.html", status_code=status_code, context=context
         )
+    hashed_password = await hashing_pool.hash(password)
     user = await User.create(
-        username=username, hashed_password=get_password_hash(password), email=email
+        username=username, hashed_password=hashed_password, email=email
     )
     logger.info(f"User: {user.username} created")
     response = RedirectResponse(url="/user/login", status_code=status.HTTP_302_FOUND)
@@ -120,7 +121,7 @@ async def login_post(
 
     context = {"title": "Login"}
     user = await User.filter(username=username).first()
-    if not user or not verify_password(password, user.hashed_password):
+    if not user or not await hashing_pool.verify(password, user.hashed_password):
         error = "Incorrect login or password"
         context["error"] = error
         return templates.TemplateResponse(request, "login.html", context=context)
@@ -149,6 +150,7 @@ async def logout_get(request: Request):
     :return: RedirectResponse: A redirect to the login page after logging out.
     """
 
+    session_cache.invalidate(token=request.cookies.get("session"))
     response = RedirectResponse(url="/user/login", status_code=status.HTTP_302_FOUND)
     response.delete_cookie("session")
     return response
@@ -1,19 +1,58 @@
 import asyncio
-import shutil
 import uuid
+from datetime import datetime
 from typing import Annotated, Optional
 
-from fastapi import APIRouter, Form, Request, status
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import APIRouter, Form, HTTPException, Request, status
+from fastapi.responses import (HTMLResponse, JSONResponse, RedirectResponse,
+                               Response, StreamingResponse)
+from tortoise import timezone
+from tortoise.expressions import Q
 
+from contextly.models.media import Media
 from contextly.models.user import UserSchema
 from contextly.models.video import Video
-from contextly.settings import logger, templates
+from contextly.settings import (DOWNLOAD_POLICIES, DOWNLOAD_POLICY,
+                                VIDEO_PAGE_SIZE, logger, templates)
 from contextly.utils.auth import auth_cookies
+from contextly.utils.events import video_events
+from contextly.utils.hls import MASTER_PLAYLIST
+from contextly.utils.jobs import job_queue
+from contextly.utils.media import add_video, get_or_create_media, remove_video
+from contextly.utils.storage import storage
+from contextly.utils.transcripts import (get_segments, get_transcript_page,
+                                         to_srt, to_vtt)
 from contextly.utils.youtubedl import YouTubeDl
 
 router = APIRouter(prefix="/video", tags=["video"])
 
+SUBTITLE_FORMATS = {
+    "vtt": (to_vtt, "text/vtt"),
+    "srt": (to_srt, "application/x-subrip"),
+}
+
+
+async def get_user_video(id: str, user: UserSchema) -> Video:
+    """
+    Get a video of the user with only its ids loaded, or raise 404.
+
+    :param id: (str) The ID of the video.
+    :param user: (UserSchema) The authenticated user.
+    :return: Video: The video.
+    """
+
+    try:
+        video = (
+            await Video.filter(id=uuid.UUID(id), user_id=user.id)
+            .only("id", "media_id")
+            .first()
+        )
+    except ValueError:
+        video = None
+    if video is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    return video
+
 
 @router.get("/download", response_class=HTMLResponse)
 @auth_cookies
@@ -25,56 +64,141 @@ async def download_page(request: Request, user: Optional[UserSchema] = None):
     :param user: (Optional[UserSchema]): The authenticated user (from the cookie).
     :return: HTMLResponse: The rendered download page template.
     """
-    context = {"title": "Download"}
+    context = {
+        "title": "Download",
+        "policies": DOWNLOAD_POLICIES,
+        "policy": DOWNLOAD_POLICY,
+    }
     return templates.TemplateResponse(request, "download.html", context=context)
 
 
 @router.post("/download", response_class=HTMLResponse)
 @auth_cookies
 async def download_page(
-    request: Request, url: Annotated[str, Form()], user: Optional[UserSchema] = None
+    request: Request,
+    url: Annotated[str, Form()],
+    policy: Annotated[str, Form()] = DOWNLOAD_POLICY,
+    user: Optional[UserSchema] = None,
 ):
     """
     Handles the submission of a video URL to be downloaded. If the video has already been downloaded,
     provides a link to the existing video. Otherwise, initiates the download process.
+    Urls are normalized to the YouTube video ID, and a video already processed
+    for another user is shared instead of being downloaded again.
 
     :param request: (Request): The HTTP request object.
     :param url: (str): The URL of the video to be downloaded.
+    :param policy: (str): Download policy: full, audio_first or audio_only.
     :param user: (Optional[UserSchema]): The authenticated user (from the cookie).
     :return: HTMLResponse: The rendered download page template with a success or error message.
     """
 
-    context = {"title": "Download"}
-    existing_video = await Video.filter(url=url, user_id=user.id).first()
+    context = {
+        "title": "Download",
+        "policies": DOWNLOAD_POLICIES,
+        "policy": DOWNLOAD_POLICY,
+    }
+    if policy not in DOWNLOAD_POLICIES:
+        context["info"] = f"Unknown download policy {policy}"
+        return templates.TemplateResponse(
+            request, "download.html", status_code=400, context=context
+        )
+    media, created = await get_or_create_media(url, policy)
+    existing_video = await Video.filter(media_id=media.id, user_id=user.id).first()
     if existing_video:
-        context["info"] = f"Video Already exist, {existing_video.title}"
+        context["info"] = f"Video Already exist, {media.title}"
         context["info_url"] = f"/video/download_list/{existing_video.id}"
         logger.info("Already exist")
         return templates.TemplateResponse(request, "download.html", context=context)
-    video = await Video.create(url=url, user_id=user.id)
-    ytdl = YouTubeDl()
-    asyncio.create_task(ytdl.download_video_with_async_hook(video))
-    logger.info(f"Loading {video.url}")
-    context["info"] = f"Loading {video.url}"
+    await add_video(user.id, media, url)
+    restart = media.status == "error"
+    if restart:
+        await Media.filter(id=media.id).update(status="create")
+    if created or restart:
+        ytdl = YouTubeDl()
+        job_queue.submit(ytdl.download_video_with_async_hook, media)
+        logger.info(f"Loading {media.url}")
+    else:
+        logger.info(f"Shared {media.url} ({media.refs + 1} videos)")
+    context["info"] = f"Loading {media.url}"
     return templates.TemplateResponse(request, "download.html", context=context)
 
 
 @router.get("/download_list", response_class=HTMLResponse)
 @auth_cookies
-async def download_page(request: Request, user: Optional[UserSchema] = None):
+async def download_page(
+    request: Request, cursor: Optional[str] = None, user: Optional[UserSchema] = None
+):
     """
-    Renders a list of videos that the user has downloaded.
+    Renders a page of videos that the user has downloaded, newest first.
+    Only the rendered columns are loaded, and pages are selected with
+    a `(created_at, id)` keyset cursor.
 
     :param request: (Request): The HTTP request object.
+    :param cursor: (Optional[str]): `created_at` and id of the last video
+        of the previous page.
     :param user: (Optional[UserSchema]): The authenticated user (from the cookie).
     :return: HTMLResponse: The rendered download list page with the user's videos.
     """
 
-    videos = await Video.filter(user_id=user.id)
-    context = {"videos": videos, "title": "Videos"}
+    query = Video.filter(user_id=user.id)
+    if cursor:
+        try:
+            created_at, id = cursor.split("_")
+            created_at, id = datetime.fromisoformat(created_at), uuid.UUID(id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=id)
+        )
+    videos = (
+        await query.order_by("-created_at", "-id")
+        .limit(VIDEO_PAGE_SIZE + 1)
+        .values(
+            "id",
+            "created_at",
+            "media_id",
+            title="media__title",
+            status="media__status",
+        )
+    )
+    context = {"videos": videos[:VIDEO_PAGE_SIZE], "title": "Videos"}
+    if len(videos) > VIDEO_PAGE_SIZE:
+        last = videos[VIDEO_PAGE_SIZE - 1]
+        context["next_cursor"] = f"{last['created_at'].isoformat()}_{last['id']}"
     return templates.TemplateResponse(request, "download_list.html", context=context)
 
 
+@router.get("/events")
+@auth_cookies
+async def download_page(request: Request, user: Optional[UserSchema] = None):
+    """
+    Streams status and progress changes of the user's videos as server-sent events.
+
+    :param request: (Request): The HTTP request object.
+    :param user: (Optional[UserSchema]): The authenticated user (from the cookie).
+    :return: StreamingResponse: The `text/event-stream` of video changes.
+    """
+
+    async def stream():
+        queue = video_events.subscribe(user.id)
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                    yield f"data: {event}\n\n"
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            video_events.unsubscribe(user.id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
 @router.get("/download_list/{id}", response_class=HTMLResponse)
 @auth_cookies
 async def download_page(request: Request, id: str, user: Optional[UserSchema] = None):
@@ -87,16 +211,109 @@ async def download_page(request: Request, id: str, user: Optional[UserSchema] =
     :return: HTMLResponse: The rendered video page with details of the selected video.
     """
 
-    video = await Video.filter(id=uuid.UUID(id), user_id=user.id).first()
-    context = {"video": video, "title": f"Videos {video.title}"}
+    video = await get_user_video(id, user)
+    media = (
+        await Media.filter(id=video.media_id)
+        .only(
+            "id",
+            "url",
+            "title",
+            "status",
+            "description",
+            "download_policy",
+            "audio_seconds",
+            "speech_seconds",
+        )
+        .first()
+    )
+    await Media.filter(id=media.id).update(viewed_at=timezone.now())
+    refetch = await Media.filter(id=media.id, evicted=True).update(evicted=False)
+    if refetch:
+        job_queue.create_task(YouTubeDl().refetch(media))
+        logger.info(f"Refetch evicted media {media.url}")
+    context = {
+        "video": video,
+        "media": media,
+        "refetch": refetch,
+        "hls": await storage.exists(f"{media.id}/hls/{MASTER_PLAYLIST}"),
+        "title": f"Videos {media.title}",
+    }
     return templates.TemplateResponse(request, "video.html", context=context)
 
 
+@router.get("/transcript/{id}")
+@auth_cookies
+async def download_page(
+    request: Request, id: str, page: int = 0, user: Optional[UserSchema] = None
+):
+    """
+    Returns one page of the timestamped transcript of a video.
+
+    :param request: (Request): The HTTP request object.
+    :param id: (str) The ID of the video.
+    :param page: (int) The transcript page, starting from 0.
+    :param user: (Optional[UserSchema]): The authenticated user (from the cookie).
+    :return: JSONResponse: The segments of the page and the number of pages.
+    """
+
+    video = await get_user_video(id, user)
+    segments, pages = await get_transcript_page(video.media_id, page)
+    return JSONResponse({"segments": segments, "page": page, "pages": pages})
+
+
+@router.get("/subtitles/{id}.{format}")
+@auth_cookies
+async def download_page(
+    request: Request, id: str, format: str, user: Optional[UserSchema] = None
+):
+    """
+    Exports the stored transcript of a video as VTT or SRT subtitles.
+
+    :param request: (Request): The HTTP request object.
+    :param id: (str) The ID of the video.
+    :param format: (str) Subtitle format: vtt or srt.
+    :param user: (Optional[UserSchema]): The authenticated user (from the cookie).
+    :return: Response: The subtitle file.
+    """
+
+    if format not in SUBTITLE_FORMATS:
+        raise HTTPException(status_code=404, detail="Unknown subtitle format")
+    video = await get_user_video(id, user)
+    formatter, media_type = SUBTITLE_FORMATS[format]
+    return Response(
+        formatter(await get_segments(video.media_id)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{video.id}.{format}"'},
+    )
+
+
+@router.post("/fetch/{id}", response_class=HTMLResponse)
+@auth_cookies
+async def download_page(request: Request, id: str, user: Optional[UserSchema] = None):
+    """
+    Starts downloading the video stream of a video whose audio was downloaded alone.
+
+    :param request: (Request): The HTTP request object.
+    :param id: (str): The ID of the video.
+    :param user: (Optional[UserSchema]): The authenticated user (from the cookie).
+    :return: RedirectResponse: A redirect to the video page.
+    """
+
+    video = await get_user_video(id, user)
+    media = await Media.get(id=video.media_id)
+    YouTubeDl().start_fetch_video(media)
+    logger.info(f"Fetch video {media.url}")
+    return RedirectResponse(
+        url=f"/video/download_list/{video.id}", status_code=status.HTTP_302_FOUND
+    )
+
+
 @router.post("/delete/{id}", response_class=HTMLResponse)
 @auth_cookies
 async def download_page(request: Request, id: str, user: Optional[UserSchema] = None):
     """
-    Deletes a video from the user's download list and removes the corresponding video files.
+    Deletes a video from the user's download list. The shared media and its files
+    are removed when no other user has the video.
 
     :param request: (Request): The HTTP request object.
     :param id: (str): The ID of the video to be deleted.
@@ -104,9 +321,10 @@ async def download_page(request: Request, id: str, user: Optional[UserSchema] =
     :return: RedirectResponse: A redirect to the download list page after deletion.
     """
 
-    video = await Video.filter(id=uuid.UUID(id), user_id=user.id).first()
-    shutil.rmtree(f"downloads/{video.id}")
-    await video.delete()
+    video = await get_user_video(id, user)
+    media = await remove_video(video)
+    if media:
+        await storage.delete(str(media.id))
     return RedirectResponse(
         url="/video/download_list", status_code=status.HTTP_302_FOUND
     )
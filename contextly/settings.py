@@ -1,3 +1,4 @@
+import os
 import sys
 
 from fastapi.templating import Jinja2Templates
@@ -7,6 +8,72 @@ from passlib.context import CryptContext
 SECRET_KEY = "your_secret_key"  # secret key for use in cookie
 ALGORITHM = "HS256"  # crypto algoritm for cookie
 ACCESS_TOKEN_EXPIRE_MINUTES = 360  # access token expire time for cookie
+DB_URL = os.getenv("DB_URL", "sqlite://db.sqlite3")  # sqlite:// or postgres:// url
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))  # postgres pool
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))  # postgres pool
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))  # postgres
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # milliseconds
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1024"))  # cached sessions
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "60"))  # seconds
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))  # bcrypt threads
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", "64"))  # calls waiting for a thread
+HASH_QUEUE_TIMEOUT = float(os.getenv("HASH_QUEUE_TIMEOUT", "5"))  # seconds in queue
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "0") == "1"  # load models on startup
+STAGE_WORKERS = {  # concurrent jobs allowed in each pipeline stage
+    "download": int(os.getenv("DOWNLOAD_WORKERS", "2")),
+    "extract": int(os.getenv("EXTRACT_WORKERS", "2")),
+    "transcribe": int(os.getenv("TRANSCRIBE_WORKERS", "1")),
+    "summarize": int(os.getenv("SUMMARIZE_WORKERS", "1")),
+    "remux": int(os.getenv("REMUX_WORKERS", "1")),
+}
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")  # thread or process
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", "0"))  # torch threads per worker
+TRANSCRIBE_MODEL_WORKERS = int(os.getenv("TRANSCRIBE_MODEL_WORKERS", "1"))  # replicas
+SUMMARIZE_BATCH_SIZE = int(os.getenv("SUMMARIZE_BATCH_SIZE", "8"))  # generate batch
+PROGRESS_INTERVAL = float(os.getenv("PROGRESS_INTERVAL", "2"))  # seconds between writes
+PROGRESS_THRESHOLD = int(
+    os.getenv("PROGRESS_THRESHOLD", "5")
+)  # percent forcing a write
+VIDEO_PAGE_SIZE = int(os.getenv("VIDEO_PAGE_SIZE", "60"))  # videos per list page
+DOWNLOAD_POLICIES = ["full", "audio_first", "audio_only"]  # what is downloaded first
+DOWNLOAD_POLICY = os.getenv("DOWNLOAD_POLICY", "full")  # default download policy
+AUDIO_MODE = os.getenv("AUDIO_MODE", "mp3")  # mp3 chunks or pcm (decoded once)
+SUMMARIZE_MODE = os.getenv("SUMMARIZE_MODE", "flat")  # flat or hierarchical
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "staged")  # staged or streaming
+SUMMARY_TARGET_TOKENS = int(os.getenv("SUMMARY_TARGET_TOKENS", "200"))  # summary size
+TRANSCRIPT_BLOCK_SIZE = int(os.getenv("TRANSCRIPT_BLOCK_SIZE", "50"))  # segments/page
+TRANSCRIPT_COMPRESSION = os.getenv("TRANSCRIPT_COMPRESSION", "zstd")  # zstd or none
+STATIC_CACHE_MAX_AGE = int(os.getenv("STATIC_CACHE_MAX_AGE", "31536000"))  # seconds
+STATIC_CHUNK_SIZE = int(os.getenv("STATIC_CHUNK_SIZE", "1048576"))  # bytes per read
+HLS_ENABLED = os.getenv("HLS_ENABLED", "0") == "1"  # remux downloaded videos to HLS
+HLS_SEGMENT_SECONDS = int(os.getenv("HLS_SEGMENT_SECONDS", "6"))  # segment duration
+HLS_LOW_HEIGHT = int(os.getenv("HLS_LOW_HEIGHT", "0"))  # low rendition height, 0 off
+DOWNLOADS_DIR = os.getenv("DOWNLOADS_DIR", "downloads")  # local copy of media files
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")  # local or s3
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # S3-compatible endpoint, AWS if unset
+S3_BUCKET = os.getenv("S3_BUCKET", "contextly")
+S3_REGION = os.getenv("S3_REGION")
+S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY")
+S3_SECRET_KEY = os.getenv("S3_SECRET_KEY")
+S3_PART_SIZE = int(os.getenv("S3_PART_SIZE", "16777216"))  # multipart upload part
+S3_PRESIGN = os.getenv("S3_PRESIGN", "1") == "1"  # redirect reads to presigned URLs
+S3_PRESIGN_EXPIRES = int(os.getenv("S3_PRESIGN_EXPIRES", "3600"))  # seconds
+DISK_BUDGET_BYTES = int(os.getenv("DISK_BUDGET_BYTES", "0"))  # media files, 0 unlimited
+DISK_GC_INTERVAL = int(os.getenv("DISK_GC_INTERVAL", "300"))  # seconds between checks
+DISK_GC_TARGET = float(os.getenv("DISK_GC_TARGET", "0.9"))  # budget share kept on evict
+THUMBNAIL_SIZES = {  # variant name -> longest side, pixels
+    "card": int(os.getenv("THUMBNAIL_CARD_SIZE", "320")),
+    "detail": int(os.getenv("THUMBNAIL_DETAIL_SIZE", "960")),
+}
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))  # encoder quality
+THUMBNAIL_CACHE_DIR = os.getenv("THUMBNAIL_CACHE_DIR", "downloads/thumbnails")
+THUMBNAIL_CACHE_BYTES = int(os.getenv("THUMBNAIL_CACHE_BYTES", "268435456"))  # budget
+VAD_ENABLED = os.getenv("VAD_ENABLED", "0") == "1"  # skip silence, decoded audio only
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "-45"))  # speech level, dBFS
+VAD_MIN_SILENCE = float(os.getenv("VAD_MIN_SILENCE", "2"))  # shortest skipped gap, s
+VAD_MIN_SPEECH = float(os.getenv("VAD_MIN_SPEECH", "0.25"))  # shortest speech kept, s
+VAD_PADDING = float(os.getenv("VAD_PADDING", "0.3"))  # kept around speech, seconds
+VAD_WINDOW = float(os.getenv("VAD_WINDOW", "30"))  # regions packed per Whisper pass, s
 
 
 templates = Jinja2Templates(directory="contextly/templates")  # template folder
@@ -0,0 +1,175 @@
+import math
+import os
+import subprocess
+from typing import Iterator, List, NamedTuple, Optional
+
+import ffmpeg
+import numpy as np
+
+SAMPLE_RATE = 16000  # Whisper input sample rate
+SAMPLE_SIZE = 4  # bytes in a float32 sample
+BLOCK_SIZE = 1 << 20  # bytes read from the ffmpeg pipe at once
+
+
+class PcmChunk(NamedTuple):
+    """
+    Window of a raw 16 kHz mono float32 audio file.
+
+    Chunks are cheap to pickle, so they can be sent to inference worker
+    processes, and `load` maps the window without copying it.
+    """
+
+    path: str
+    start: int  # first sample
+    frames: int  # number of samples
+
+    def load(self) -> np.ndarray:
+        """
+        Map the chunk samples from the audio file.
+
+        :return: (np.ndarray) float32 samples, copy-on-write memory map
+        """
+
+        return np.memmap(
+            self.path,
+            dtype=np.float32,
+            mode="c",
+            offset=self.start * SAMPLE_SIZE,
+            shape=(self.frames,),
+        )
+
+
+def decode_pcm(video_path: str, output_path: str) -> int:
+    """
+    Decode the audio of a video once into a raw 16 kHz mono float32 file,
+    streamed from the ffmpeg pipe.
+    The file is written under a temporary name and renamed when complete.
+
+    :param video_path: (str) Path to video file.
+    :param output_path: (str) Path of the `.f32` file to write.
+    :return: (int) number of decoded samples
+    """
+
+    process = (
+        ffmpeg.input(video_path)
+        .output("pipe:", format="f32le", acodec="pcm_f32le", ac=1, ar=SAMPLE_RATE)
+        .global_args("-loglevel", "error")
+        .run_async(pipe_stdout=True)
+    )
+    size = 0
+    with open(f"{output_path}.tmp", "wb") as output:
+        while block := process.stdout.read(BLOCK_SIZE):
+            output.write(block)
+            size += len(block)
+    if process.wait():
+        raise RuntimeError(f"ffmpeg failed to decode audio: {video_path}")
+    os.replace(f"{output_path}.tmp", output_path)
+    return size // SAMPLE_SIZE
+
+
+def decode_stream(url: str, headers: Optional[dict] = None) -> subprocess.Popen:
+    """
+    Start decoding the audio of a remote or live stream
+    to 16 kHz mono float32 samples on the ffmpeg stdout.
+
+    :param url: (str) URL of the audio stream, or any ffmpeg input.
+    :param headers: (Optional[dict]) HTTP headers required by the stream.
+    :return: (subprocess.Popen) ffmpeg process, kill it to stop decoding
+    """
+
+    input_args = {}
+    if headers:
+        input_args["headers"] = "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+    return (
+        ffmpeg.input(url, **input_args)
+        .output("pipe:", format="f32le", acodec="pcm_f32le", ac=1, ar=SAMPLE_RATE)
+        .global_args("-loglevel", "error")
+        .run_async(pipe_stdout=True)
+    )
+
+
+def stream_pcm(
+    process: subprocess.Popen, output_path: str, chunk_duration: int
+) -> Iterator[PcmChunk]:
+    """
+    Write the samples decoded by `decode_stream` into a raw audio file
+    and yield every chunk of `chunk_duration` seconds as soon as it is written,
+    so it can be transcribed while the rest of the stream is still being read.
+
+    :param process: (subprocess.Popen) ffmpeg process from `decode_stream`.
+    :param output_path: (str) Path of the `.f32` file to write.
+    :param chunk_duration: (int) chunk duration in seconds.
+    :return: (Iterator[PcmChunk]) chunks in order, the last one may be shorter
+    """
+
+    chunk_frames = chunk_duration * SAMPLE_RATE
+    size, frames, start = 0, 0, 0
+    with open(output_path, "wb") as output:
+        while block := process.stdout.read(BLOCK_SIZE):
+            output.write(block)
+            size += len(block)
+            frames = size // SAMPLE_SIZE
+            if frames - start >= chunk_frames:
+                output.flush()
+            while frames - start >= chunk_frames:
+                yield PcmChunk(output_path, start, chunk_frames)
+                start += chunk_frames
+    if process.wait():
+        raise RuntimeError("ffmpeg failed to decode the audio stream")
+    if frames > start:
+        yield PcmChunk(output_path, start, frames - start)
+
+
+def split_pcm(path: str, frames: int, chunk_duration: int) -> List[PcmChunk]:
+    """
+    Split a raw audio file into chunks of `chunk_duration` seconds.
+
+    :param path: (str) Path of the `.f32` file.
+    :param frames: (int) number of samples in the file.
+    :param chunk_duration: (int) chunk duration in seconds.
+    :return: (List[PcmChunk])
+    """
+
+    chunk_frames = chunk_duration * SAMPLE_RATE
+    return [
+        PcmChunk(path, i * chunk_frames, min(chunk_frames, frames - i * chunk_frames))
+        for i in range(math.ceil(frames / chunk_frames))
+    ]
+
+
+def copy_audio(video_path: str, output_path: str) -> None:
+    """
+    Copy the audio track of a video into an audio-only MP4 without re-encoding.
+    The file is written under a temporary name and renamed when complete.
+
+    :param video_path: (str) Path to video file.
+    :param output_path: (str) Path of the `.m4a` file to write.
+    :return: None
+    """
+
+    (
+        ffmpeg.input(video_path)
+        .output(f"{output_path}.tmp", format="mp4", vn=None, acodec="copy")
+        .global_args("-loglevel", "error")
+        .run(overwrite_output=True, capture_stderr=True)
+    )
+    os.replace(f"{output_path}.tmp", output_path)
+
+
+def concat_audio(chunk_paths: List[str], output_path: str) -> None:
+    """
+    Join MP3 chunks into one file without re-encoding.
+    The file is written under a temporary name and renamed when complete.
+
+    :param chunk_paths: (List[str]) Paths of the chunks in order.
+    :param output_path: (str) Path of the `.mp3` file to write.
+    :return: None
+    """
+
+    (
+        ffmpeg.input(f"concat:{'|'.join(chunk_paths)}")
+        .output(f"{output_path}.tmp", format="mp3", acodec="copy")
+        .global_args("-loglevel", "error")
+        .run(overwrite_output=True, capture_stderr=True)
+    )
+    os.replace(f"{output_path}.tmp", output_path)
@@ -1,12 +1,106 @@
+import asyncio
 import functools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Optional
 
 from fastapi import HTTPException, status
 from fastapi.responses import RedirectResponse
 from jose import JWTError, jwt
+from tortoise.signals import post_delete, post_save
 
 from contextly.models.user import User
-from contextly.settings import ALGORITHM, SECRET_KEY, pwd_context
+from contextly.settings import (ALGORITHM, HASH_QUEUE_SIZE, HASH_QUEUE_TIMEOUT,
+                                HASH_WORKERS, SECRET_KEY, SESSION_CACHE_SIZE,
+                                SESSION_CACHE_TTL, pwd_context)
+
+
+class SessionCache:
+    """
+    Bounded TTL cache of authenticated users keyed by session token.
+
+    Hot sessions are served without decoding the JWT and querying the user.
+    Entries live at most `ttl` seconds and never past the token expiry,
+    the least recently used entry is dropped when the cache is full.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()  # token -> (expire time, user)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[User]:
+        """
+        Get the cached user of a session token.
+
+        :param token: (str) session token
+        :return: (Optional[User]) the user or None if not cached or expired
+        """
+
+        with self.lock:
+            entry = self.entries.get(token)
+            if entry and entry[0] > time.monotonic():
+                self.entries.move_to_end(token)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self.entries[token]
+            self.misses += 1
+            return None
+
+    def set(self, token: str, user: User, exp: Optional[float] = None) -> None:
+        """
+        Cache the user of a session token.
+
+        :param token: (str) session token
+        :param user: (User) authenticated user
+        :param exp: (Optional[float]) token expiry as a UNIX timestamp
+        :return: None
+        """
+
+        ttl = self.ttl if exp is None else min(self.ttl, exp - time.time())
+        if ttl <= 0:
+            return
+        with self.lock:
+            self.entries[token] = (time.monotonic() + ttl, user)
+            self.entries.move_to_end(token)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, token: Optional[str] = None, user_id: Optional[int] = None):
+        """
+        Drop a session token or every session of a user.
+
+        :param token: (Optional[str]) session token
+        :param user_id: (Optional[int]) id of the user
+        :return: None
+        """
+
+        with self.lock:
+            self.entries.pop(token, None)
+            if user_id is not None:
+                for key, (_, user) in list(self.entries.items()):
+                    if user.id == user_id:
+                        del self.entries[key]
+
+
+session_cache = SessionCache(SESSION_CACHE_SIZE, SESSION_CACHE_TTL)
+
+
+@post_save(User)
+@post_delete(User)
+async def user_changed(sender, instance: User, *args):
+    """
+    Drop cached sessions of a changed or deleted user.
+    """
+
+    session_cache.invalidate(user_id=instance.id)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -30,6 +124,69 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class HashingPool:
+    """
+    Bounded executor for password hashing and verification.
+
+    bcrypt is deliberately slow, so it runs in a few dedicated threads
+    instead of the event loop. At most `queue_size` calls wait for a free
+    thread; further callers wait up to `timeout` seconds for a place in
+    the queue and are then rejected with 503 Service Unavailable.
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout: float):
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="hashing")
+        self.slots = asyncio.Semaphore(workers + queue_size)
+        self.timeout = timeout
+
+    async def run(self, func: callable, *args):
+        """
+        Run a hashing function in the pool.
+
+        :param func: (callable) function to run
+        :param args: function arguments
+        :return: function result
+        """
+
+        try:
+            await asyncio.wait_for(self.slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many login attempts, try again later",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.slots.release()
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verify if a plain-text password matches the hashed password in the pool.
+
+        :param plain_password: (str) plain-text password
+        :param hashed_password: (str) hashed password
+        :return: (bool)
+        """
+
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a plain-text password in the pool.
+
+        :param password: (str) plain-text password
+        :return: (str) hashed password
+        """
+
+        return await self.run(get_password_hash, password)
+
+
+hashing_pool = HashingPool(HASH_WORKERS, HASH_QUEUE_SIZE, HASH_QUEUE_TIMEOUT)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """
     Create a JSON Web Token (JWT) for user authentication.
@@ -70,16 +227,20 @@ def auth_cookies(func: callable) -> callable:
         token = request.cookies.get("session")
         if not token:
             return RedirectResponse(url="/user/login")
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            email = payload.get("sub")
-            user = await User.filter(email=email).first()
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
-                )
-        except JWTError:
-            return RedirectResponse(url="/user/login")
+        user = session_cache.get(token)
+        if not user:
+            try:
+                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+                email = payload.get("sub")
+                user = await User.filter(email=email).first()
+                if not user:
+                    raise HTTPException(
+                        status_code=status.HTTP_401_UNAUTHORIZED,
+                        detail="Invalid token",
+                    )
+            except JWTError:
+                return RedirectResponse(url="/user/login")
+            session_cache.set(token, user, payload.get("exp"))
         kwargs["user"] = user
         result = await func(*args, **kwargs)
         return result
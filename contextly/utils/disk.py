@@ -0,0 +1,220 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from contextly.models.media import Media
+from contextly.settings import (DISK_BUDGET_BYTES, DISK_GC_INTERVAL,
+                                DISK_GC_TARGET, THUMBNAIL_CACHE_DIR, logger)
+from contextly.utils.jobs import FINAL_STATUSES
+from contextly.utils.storage import storage
+
+EVICTION_TIERS = ["chunks", "media"]  # evicted first to last
+HEAVY_DIRS = ["audio", "video", "hls"]  # thumbnails in `img` are always kept
+
+
+class MediaFiles(NamedTuple):
+    """
+    Heavy files of a media found on disk, by eviction tier.
+    """
+
+    chunks: List[Tuple[str, int]]  # intermediate audio chunks: path, size
+    media: List[Tuple[str, int]]  # video, audio and HLS stream: path, size
+    modified: float  # last modification of any of the files
+
+
+def is_chunk(name: str) -> bool:
+    """
+    Check if a file of the `audio` directory is an intermediate audio chunk,
+    written for transcription only.
+
+    :param name: (str) file name
+    :return: (bool)
+    """
+
+    stem, suffix = os.path.splitext(name)
+    return (suffix == ".mp3" and stem.isdigit()) or name in ("audio.f32", "stream.f32")
+
+
+def scan_files(
+    root: str, exclude: Sequence[str] = ()
+) -> Tuple[int, Dict[str, MediaFiles]]:
+    """
+    Measure the disk usage of the media files.
+
+    :param root: (str) directory of the media files
+    :param exclude: (Sequence[str]) directories inside the root with a budget
+        of their own, e.g. the thumbnail cache, not counted in the total
+    :return: (Tuple[int, Dict[str, MediaFiles]]) total size of the directory
+        in bytes and the heavy files of each media id
+    """
+
+    total, found = 0, {}
+    excluded = {os.path.abspath(path) for path in exclude}
+    for dir_path, dir_names, names in os.walk(root):
+        dir_names[:] = [
+            name
+            for name in dir_names
+            if os.path.abspath(os.path.join(dir_path, name)) not in excluded
+        ]
+        for name in names:
+            try:
+                total += os.stat(os.path.join(dir_path, name)).st_size
+            except FileNotFoundError:
+                continue
+    for entry in os.scandir(root) if os.path.isdir(root) else []:
+        try:
+            id = str(uuid.UUID(entry.name))
+        except ValueError:
+            continue
+        files = MediaFiles([], [], 0.0)
+        for heavy_dir in HEAVY_DIRS:
+            for dir_path, _, names in os.walk(os.path.join(entry.path, heavy_dir)):
+                for name in names:
+                    path = os.path.join(dir_path, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    chunk = heavy_dir == "audio" and is_chunk(name)
+                    (files.chunks if chunk else files.media).append(
+                        (path, stat.st_size)
+                    )
+                    files = files._replace(modified=max(files.modified, stat.st_mtime))
+        if files.chunks or files.media:
+            found[id] = files
+    return total, found
+
+
+def remove_files(files: List[Tuple[str, int]]) -> int:
+    """
+    Delete files.
+
+    :param files: (List[Tuple[str, int]]) paths and sizes
+    :return: (int) freed bytes
+    """
+
+    freed = 0
+    for path, size in files:
+        try:
+            os.remove(path)
+            freed += size
+        except FileNotFoundError:
+            continue
+    return freed
+
+
+class DiskCollector:
+    """
+    Background collector keeping the media files within a disk budget.
+
+    When the files grow over the budget, heavy files of the least recently viewed
+    media are deleted until usage is back under `target` of the budget:
+    intermediate audio chunks of every media first, then videos, audio and HLS
+    streams. Thumbnails, transcripts and summaries are always kept. Media whose
+    files are deleted are marked `evicted` and fetched again when their page is
+    opened; with a remote storage only the local copies are deleted.
+    The thumbnail cache is kept within its own budget and is not counted.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        budget: int,
+        interval: int,
+        target: float = 0.9,
+        exclude: Sequence[str] = (THUMBNAIL_CACHE_DIR,),
+    ):
+        """
+        :param root: (str) directory of the media files
+        :param budget: (int) size of the media files to keep in bytes, 0 unlimited
+        :param interval: (int) seconds between checks, files written more recently
+            are not deleted
+        :param target: (float) share of the budget to free the disk down to
+        :param exclude: (Sequence[str]) directories not counted in the budget
+        """
+
+        self.root = root
+        self.budget = budget
+        self.interval = interval
+        self.target = target
+        self.exclude = exclude
+        self.task: Optional[asyncio.Task] = None
+
+    async def collect(self) -> int:
+        """
+        Delete heavy files of the least recently viewed media if over the budget.
+        Media being processed and files written during the last interval are kept.
+
+        :return: (int) freed bytes
+        """
+
+        if not self.budget:
+            return 0
+        total, found = await asyncio.to_thread(scan_files, self.root, self.exclude)
+        if total <= self.budget:
+            return 0
+        goal = total - int(self.budget * self.target)
+        recent = time.time() - self.interval
+        media = await Media.filter(
+            id__in=[id for id, files in found.items() if files.modified < recent],
+            status__in=FINAL_STATUSES,
+        ).values("id", "viewed_at", "created_at")
+        media.sort(key=lambda item: item["viewed_at"] or item["created_at"])
+
+        freed = 0
+        for tier in EVICTION_TIERS:
+            for item in media:
+                if freed >= goal:
+                    break
+                files = getattr(found[str(item["id"])], tier)
+                if not files:
+                    continue
+                freed += await asyncio.to_thread(remove_files, files)
+                if tier == "media" and not storage.remote:
+                    await Media.filter(id=item["id"]).update(evicted=True)
+                logger.info(f"Evicted {tier}: {item['id']} ({len(files)} files)")
+        logger.info(f"Disk collector: {total} bytes used, {freed} freed")
+        return freed
+
+    async def run(self) -> None:
+        """
+        Check the disk budget every interval.
+
+        :return: None
+        """
+
+        while True:
+            try:
+                await self.collect()
+            except Exception as e:
+                logger.error(f"Disk collector error: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """
+        Start the collector in the background, if a budget is set.
+
+        :return: None
+        """
+
+        if self.budget:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Stop the background collector.
+
+        :return: None
+        """
+
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+
+disk_collector = DiskCollector(
+    storage.root, DISK_BUDGET_BYTES, DISK_GC_INTERVAL, DISK_GC_TARGET
+)
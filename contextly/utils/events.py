@@ -0,0 +1,83 @@
+import asyncio
+import json
+from collections import defaultdict
+from uuid import UUID
+
+from tortoise.signals import post_save
+
+from contextly.models.media import Media
+from contextly.models.video import Video
+
+
+class VideoEvents:
+    """
+    In-process publisher of video status changes.
+
+    Every open page of a user subscribes with its own queue and receives
+    only the changed fields of that user's videos. A change of a shared media
+    is sent to each subscribed user as a change of their own video.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.subscribers = defaultdict(set)  # user id -> subscriber queues
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """
+        Subscribe to the video events of a user.
+
+        :param user_id: (int) id of the user
+        :return: (asyncio.Queue) queue receiving the events
+        """
+
+        queue = asyncio.Queue(self.queue_size)
+        self.subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        """
+        Remove a subscriber queue.
+
+        :param user_id: (int) id of the user
+        :param queue: (asyncio.Queue) queue returned by `subscribe`
+        :return: None
+        """
+
+        self.subscribers[user_id].discard(queue)
+        if not self.subscribers[user_id]:
+            del self.subscribers[user_id]
+
+    async def publish(self, media_id: UUID, **fields) -> None:
+        """
+        Send changed fields of a media to the subscribers of the users
+        whose videos refer to it. Slow subscribers with a full queue miss the event.
+
+        :param media_id: (UUID) id of the media
+        :param fields: changed media fields
+        :return: None
+        """
+
+        if not self.subscribers:
+            return
+        videos = await Video.filter(
+            media_id=media_id, user_id__in=list(self.subscribers)
+        ).values_list("id", "user_id")
+        for video_id, user_id in videos:
+            event = json.dumps({"id": str(video_id), **fields})
+            for queue in self.subscribers.get(user_id, ()):
+                if not queue.full():
+                    queue.put_nowait(event)
+
+
+video_events = VideoEvents()
+
+
+@post_save(Media)
+async def media_saved(sender, instance: Media, created, using_db, update_fields):
+    """
+    Publish the status of a saved media.
+    """
+
+    await video_events.publish(
+        instance.id, status=instance.status, title=instance.title
+    )
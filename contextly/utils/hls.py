@@ -0,0 +1,136 @@
+import os
+import shutil
+from typing import List, NamedTuple
+
+import ffmpeg
+
+MASTER_PLAYLIST = "master.m3u8"
+
+
+class Rendition(NamedTuple):
+    """
+    Variant stream of an HLS master playlist.
+    """
+
+    name: str  # directory of the rendition playlist and segments
+    bandwidth: int  # peak bits per second
+    width: int
+    height: int
+
+
+def remux_rendition(
+    video_path: str, output_path: str, segment_seconds: int, **codec_args
+) -> None:
+    """
+    Write a VOD playlist with fMP4 segments of a video.
+
+    :param video_path: (str) Path to video file.
+    :param output_path: (str) Directory of the playlist and segments.
+    :param segment_seconds: (int) target segment duration
+    :param codec_args: ffmpeg output arguments, `c="copy"` keeps the codecs
+    :return: None
+    """
+
+    os.makedirs(output_path, exist_ok=True)
+    (
+        ffmpeg.input(video_path)
+        .output(
+            f"{output_path}/index.m3u8",
+            format="hls",
+            hls_time=segment_seconds,
+            hls_playlist_type="vod",
+            hls_segment_type="fmp4",
+            hls_fmp4_init_filename="init.mp4",
+            hls_segment_filename=f"{output_path}/%05d.m4s",
+            **codec_args,
+        )
+        .global_args("-loglevel", "error")
+        .run(overwrite_output=True, capture_stderr=True)
+    )
+
+
+def master_playlist(renditions: List[Rendition]) -> str:
+    """
+    Format the HLS master playlist of the renditions, best first.
+
+    :param renditions: (List[Rendition]) variant streams
+    :return: (str)
+    """
+
+    lines = ["#EXTM3U", "#EXT-X-VERSION:7"]
+    for rendition in renditions:
+        lines.append(
+            f"#EXT-X-STREAM-INF:BANDWIDTH={rendition.bandwidth},"
+            f"RESOLUTION={rendition.width}x{rendition.height}"
+        )
+        lines.append(f"{rendition.name}/index.m3u8")
+    return "\n".join(lines) + "\n"
+
+
+def build_hls(
+    video_path: str, output_path: str, segment_seconds: int, low_height: int = 0
+) -> List[Rendition]:
+    """
+    Remux a downloaded video to HLS for segmented streaming.
+
+    The source rendition copies the codecs and is only re-encoded if they
+    can't be copied. With `low_height` a low-bitrate H.264 rendition is added
+    for weak links. The stream is built in a temporary directory and moved
+    into place when complete, so its files never change once served.
+
+    :param video_path: (str) Path to video file.
+    :param output_path: (str) Directory of the master playlist.
+    :param segment_seconds: (int) target segment duration
+    :param low_height: (int) height of the low-bitrate rendition, 0 disables it
+    :return: (List[Rendition]) written renditions
+    """
+
+    probe = ffmpeg.probe(video_path)
+    stream = next(s for s in probe["streams"] if s["codec_type"] == "video")
+    width, height = int(stream["width"]), int(stream["height"])
+    bandwidth = int(
+        probe["format"].get("bit_rate")
+        or os.path.getsize(video_path) * 8 / float(probe["format"]["duration"])
+    )
+
+    tmp_path = f"{output_path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    try:
+        remux_rendition(video_path, f"{tmp_path}/source", segment_seconds, c="copy")
+    except ffmpeg.Error:
+        shutil.rmtree(f"{tmp_path}/source", ignore_errors=True)
+        remux_rendition(
+            video_path,
+            f"{tmp_path}/source",
+            segment_seconds,
+            **{"c:v": "libx264", "preset": "veryfast", "crf": 23, "c:a": "aac"},
+        )
+    renditions = [Rendition("source", bandwidth, width, height)]
+
+    if low_height and low_height < height:
+        video_bitrate = low_height * 2500  # 360p -> 900 kbit/s
+        remux_rendition(
+            video_path,
+            f"{tmp_path}/low",
+            segment_seconds,
+            **{
+                "vf": f"scale=-2:{low_height}",
+                "c:v": "libx264",
+                "preset": "veryfast",
+                "b:v": video_bitrate,
+                "maxrate": video_bitrate,
+                "bufsize": video_bitrate * 2,
+                "c:a": "aac",
+                "b:a": "96k",
+            },
+        )
+        low_width = round(width * low_height / height / 2) * 2
+        renditions.append(
+            Rendition("low", video_bitrate + 96_000, low_width, low_height)
+        )
+
+    with open(f"{tmp_path}/{MASTER_PLAYLIST}", "w") as file:
+        file.write(master_playlist(renditions))
+    shutil.rmtree(output_path, ignore_errors=True)
+    os.replace(tmp_path, output_path)
+    return renditions
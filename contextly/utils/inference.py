@@ -0,0 +1,210 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+import torch
+
+from contextly.settings import logger
+from contextly.utils.audio import PcmChunk
+from contextly.utils.transcriber import BaseTranscriber
+from contextly.utils.vad import SpeechChunk
+
+worker_model = None  # model loaded once in every inference worker process
+worker_stats = {}  # load time and memory of the worker model
+worker_ready = None  # barrier of all workers of the pool
+
+
+def get_rss() -> int:
+    """
+    Get resident set size of the current process.
+
+    :return: (int) resident memory in bytes
+    """
+
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def init_worker(
+    loader: Callable, torch_threads: int, ready: Optional[threading.Barrier] = None
+) -> None:
+    """
+    Initialize an inference worker process: limit torch threads and load the model.
+
+    :param loader: (Callable) function returning the loaded model
+    :param torch_threads: (int) number of torch threads, 0 keeps the torch default
+    :param ready: (Optional[threading.Barrier]) barrier of all workers of the pool,
+        waited for by `warm_up_worker`
+    :return: None
+    """
+
+    global worker_model, worker_stats, worker_ready
+    worker_ready = ready
+    if torch_threads:
+        torch.set_num_threads(torch_threads)
+    start = time.perf_counter()
+    worker_model = loader()
+    worker_stats = {
+        "pid": os.getpid(),
+        "load_time": round(time.perf_counter() - start, 3),
+        "rss_mb": round(get_rss() / 2**20, 1),
+    }
+    logger.info(
+        f"Inference worker {os.getpid()} loaded {loader.__name__} "
+        f"in {worker_stats['load_time']:.1f}s, threads: {torch.get_num_threads()}"
+    )
+
+
+def warm_up_worker(timeout: float) -> dict:
+    """
+    Report the model load stats of a worker once every worker of the pool
+    has started, so each warm-up call of a pool is run by a different worker.
+
+    :param timeout: (float) seconds to wait for the other workers
+    :return: (dict) worker pid, model load time and resident memory
+    """
+
+    if worker_ready is not None:
+        try:
+            worker_ready.wait(timeout)
+        except threading.BrokenBarrierError:
+            pass
+    return worker_stats
+
+
+def transcribe_worker(
+    audio_path: Union[str, PcmChunk, SpeechChunk], offset: float, output_path: str
+) -> str:
+    """
+    Transcribe an audio file in a worker and write the segments to a JSON file.
+    PCM chunks are mapped by the worker from the shared `.f32` file.
+
+    :param audio_path: (str | PcmChunk | SpeechChunk) path to audio file,
+        PCM chunk or its speech windows
+    :param offset: (float) start of the chunk in the video, seconds
+    :param output_path: (str) path of the JSON file to write
+    :return: (str) path of the written JSON file
+    """
+
+    segments = worker_model._transcribe_chunk(audio_path, offset)
+    Path(output_path).write_text(json.dumps(segments, ensure_ascii=False))
+    return output_path
+
+
+def summarize_worker(input_path: str) -> str:
+    """
+    Summarize the text stored in a file in a worker.
+
+    :param input_path: (str) path of the text file to summarize
+    :return: (str) the generated summary
+    """
+
+    return worker_model._get_summary(Path(input_path).read_text())
+
+
+class ProcessModel:
+    """
+    Base class for a model running in a pool of dedicated worker processes.
+
+    Every worker loads its own copy of the model once and keeps it warm,
+    so PyTorch work doesn't compete with request handling in the API process.
+    Inputs and outputs are exchanged through files instead of pickled payloads.
+    """
+
+    def __init__(self, loader: Callable, workers: int, torch_threads: int):
+        context = multiprocessing.get_context("spawn")
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=init_worker,
+            initargs=(loader, torch_threads, context.Barrier(workers)),
+        )
+
+    async def warm_up(self, timeout: float = 600) -> List[dict]:
+        """
+        Start every worker process and wait until its model is loaded.
+        The pool itself only starts workers when tasks are submitted.
+
+        :param timeout: (float) seconds to wait for the slowest worker
+        :return: (List[dict]) pid, model load time and resident memory
+            of every worker
+        """
+
+        loop = asyncio.get_event_loop()
+        stats = await asyncio.gather(
+            *(
+                loop.run_in_executor(self.executor, warm_up_worker, timeout)
+                for _ in range(self.workers)
+            )
+        )
+        return list({item["pid"]: item for item in stats}.values())
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker processes.
+
+        :return: None
+        """
+
+        self.executor.shutdown(cancel_futures=True)
+
+
+class ProcessTranscriber(ProcessModel, BaseTranscriber):
+    """
+    Whisper transcriber running in worker processes.
+    """
+
+    async def transcribe_chunk(
+        self, audio: Union[os.PathLike, PcmChunk, SpeechChunk], offset: float = 0.0
+    ) -> List[dict]:
+        """
+        Transcribe one audio chunk in a worker process.
+        Used directly to transcribe chunks of a stream as they arrive.
+
+        :param audio: (os.PathLike | PcmChunk | SpeechChunk) audio file, PCM chunk
+            or its speech windows
+        :param offset: (float) start of the chunk in the video, seconds
+        :return: (List[dict]) segments with `start`, `end` and `text`
+        """
+
+        loop = asyncio.get_event_loop()
+        with tempfile.TemporaryDirectory() as tmp:
+            output_path = await loop.run_in_executor(
+                self.executor, transcribe_worker, audio, offset, f"{tmp}/chunk.json"
+            )
+            return json.loads(Path(output_path).read_text())
+
+
+class ProcessSummarizer(ProcessModel):
+    """
+    T5 summarizer running in worker processes.
+    """
+
+    async def get_summary(self, text: str) -> str:
+        """
+        Generate a summary for the given text in a worker process.
+
+        :param text: (str) The input text to summarize.
+        :return: (str) The generated summary.
+        """
+
+        loop = asyncio.get_event_loop()
+        with tempfile.TemporaryDirectory() as tmp:
+            input_path = Path(f"{tmp}/text.txt")
+            input_path.write_text(text)
+            return await loop.run_in_executor(
+                self.executor, summarize_worker, str(input_path)
+            )
@@ -0,0 +1,106 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from contextly.models.media import Media
+from contextly.settings import STAGE_WORKERS, logger
+from contextly.utils.events import video_events
+
+FINAL_STATUSES = ["done", "error"]
+
+
+class JobQueue:
+    """
+    Durable queue of video processing jobs.
+
+    The `media` table is the queue itself: every row whose status is not final
+    is a pending job, so jobs interrupted by a restart are picked up again
+    by `resume`. Each pipeline stage has its own concurrency limit, taken
+    with `stage`, so a burst of submissions can't start every download,
+    ffmpeg and Whisper run at once.
+    """
+
+    def __init__(self, workers: dict):
+        self.workers = workers
+        self.stages = {name: asyncio.Semaphore(n) for name, n in workers.items()}
+        self.tasks = set()
+
+    def stage(self, name: str) -> asyncio.Semaphore:
+        """
+        Get the concurrency limit of a pipeline stage.
+
+        :param name: (str) stage name: download, extract, transcribe, summarize or remux
+        :return: (asyncio.Semaphore) use as `async with job_queue.stage(name)`
+        """
+
+        return self.stages[name]
+
+    def submit(self, runner: Callable[[Media], Awaitable[None]], media: Media) -> None:
+        """
+        Start processing a media in the background and keep a reference to the task.
+
+        :param runner: (Callable) pipeline coroutine function taking the media
+        :param media: (Media) item of db model
+        :return: None
+        """
+
+        self.create_task(self._run(runner, media))
+
+    def create_task(self, coro: Awaitable) -> asyncio.Task:
+        """
+        Start a background task and keep a reference to it until it is done.
+
+        :param coro: (Awaitable) coroutine to run
+        :return: (asyncio.Task)
+        """
+
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def resume(self, runner: Callable[[Media], Awaitable[None]]) -> None:
+        """
+        Resubmit every media left unfinished by a previous run.
+
+        :param runner: (Callable) pipeline coroutine function taking the media
+        :return: None
+        """
+
+        media = await Media.exclude(status__in=FINAL_STATUSES)
+        for item in media:
+            logger.info(f"Resume job: {item.id} {item.url} ({item.status})")
+            self.submit(runner, item)
+
+    async def shutdown(self) -> None:
+        """
+        Cancel running jobs. Their rows keep a non-final status and are resumed
+        on the next startup.
+
+        :return: None
+        """
+
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    @staticmethod
+    async def _run(runner: Callable[[Media], Awaitable[None]], media: Media) -> None:
+        """
+        Run the pipeline for a media and mark it as failed on error.
+
+        :param runner: (Callable) pipeline coroutine function taking the media
+        :param media: (Media) item of db model
+        :return: None
+        """
+
+        try:
+            await runner(media)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Job error {media.id} {media.url}: {e}")
+            await Media.filter(id=media.id).update(status="error")
+            await video_events.publish(media.id, status="error")
+
+
+job_queue = JobQueue(STAGE_WORKERS)
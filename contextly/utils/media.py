@@ -0,0 +1,91 @@
+import re
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from tortoise.expressions import F
+from tortoise.transactions import in_transaction
+
+from contextly.models.media import Media
+from contextly.models.video import Video
+
+YOUTUBE_ID = re.compile(r"[A-Za-z0-9_-]{11}")
+YOUTUBE_PATHS = ["shorts", "embed", "live", "v"]  # /<path>/<id> urls
+
+
+def get_source_id(url: str) -> Tuple[str, str]:
+    """
+    Normalize a video url to the key of its shared media.
+
+    YouTube urls in any form (`youtu.be/<id>`, `watch?v=<id>&t=30&list=...`,
+    `/shorts/<id>`, `/embed/<id>`, mobile and music hosts) give `youtube:<id>`
+    and the canonical watch url. Other urls are used as they are.
+
+    :param url: (str) url submitted by the user
+    :return: (Tuple[str, str]) media key and canonical url
+    """
+
+    url = url.strip()
+    parsed = urlparse(url if "//" in url else f"https://{url}")
+    host = re.sub(r"^(www|m|music)\.", "", (parsed.hostname or "").lower())
+    path = parsed.path.strip("/").split("/")
+    video_id = None
+    if host == "youtu.be":
+        video_id = path[0]
+    elif host in ["youtube.com", "youtube-nocookie.com"]:
+        if path[0] == "watch":
+            video_id = parse_qs(parsed.query).get("v", [""])[0]
+        elif path[0] in YOUTUBE_PATHS and len(path) > 1:
+            video_id = path[1]
+    if video_id and YOUTUBE_ID.fullmatch(video_id):
+        return f"youtube:{video_id}", f"https://www.youtube.com/watch?v={video_id}"
+    return url, url
+
+
+async def get_or_create_media(url: str, download_policy: str) -> Tuple[Media, bool]:
+    """
+    Get the shared media of a url, or create it if the video was never submitted.
+
+    :param url: (str) url submitted by the user
+    :param download_policy: (str) download policy of a new media
+    :return: (Tuple[Media, bool]) the media and whether it was created
+    """
+
+    source_id, canonical_url = get_source_id(url)
+    return await Media.get_or_create(
+        source_id=source_id,
+        defaults={"url": canonical_url, "download_policy": download_policy},
+    )
+
+
+async def add_video(user_id: int, media: Media, url: str) -> Video:
+    """
+    Add a media to the videos of a user and take a reference to it.
+
+    :param user_id: (int) id of the user
+    :param media: (Media) item of db model
+    :param url: (str) url submitted by the user
+    :return: (Video) the created video
+    """
+
+    async with in_transaction():
+        video = await Video.create(user_id=user_id, media_id=media.id, url=url)
+        await Media.filter(id=media.id).update(refs=F("refs") + 1)
+    return video
+
+
+async def remove_video(video: Video) -> Optional[Media]:
+    """
+    Remove a video of a user and release its reference to the media.
+    The media is deleted with its transcript when no videos refer to it.
+
+    :param video: (Video) item of db model
+    :return: (Optional[Media]) the deleted media, whose files should be removed
+    """
+
+    async with in_transaction():
+        await video.delete()
+        await Media.filter(id=video.media_id).update(refs=F("refs") - 1)
+        media = await Media.filter(id=video.media_id, refs__lte=0).first()
+        if media:
+            await media.delete()
+    return media
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+from uuid import UUID
+
+from contextly.models.media import Media
+from contextly.settings import PROGRESS_INTERVAL, PROGRESS_THRESHOLD, logger
+from contextly.utils.events import video_events
+
+
+class ProgressReporter:
+    """
+    Throttled, coalesced reporter of download progress.
+
+    Progress hooks may be called many times per second from downloader threads.
+    Updates of the same media are merged and handed to the main event loop
+    thread-safely, and a targeted `UPDATE` is written at most once per `interval`
+    seconds, unless the percentage moved by `threshold` or the status changed.
+    """
+
+    def __init__(self, interval: float, threshold: int):
+        self.interval = interval
+        self.threshold = threshold
+        self.pending = {}  # media id -> fields not written yet
+        self.written = {}  # media id -> (time, percent) of the last write
+        self.lock = threading.Lock()
+
+    def report(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        media: Media,
+        percent: Optional[int] = None,
+        **fields,
+    ) -> None:
+        """
+        Report progress of a media from any thread.
+
+        :param loop: (asyncio.AbstractEventLoop) loop running the database connection
+        :param media: (Media) item of db model
+        :param percent: (Optional[int]) download percentage, None for other statuses
+        :param fields: media fields to update
+        :return: None
+        """
+
+        now = time.monotonic()
+        media_id = media.id
+        with self.lock:
+            self.pending[media_id] = {**self.pending.get(media_id, {}), **fields}
+            last_time, last_percent = self.written.get(media_id, (0.0, None))
+            if (
+                percent is not None
+                and last_percent is not None
+                and now - last_time < self.interval
+                and abs(percent - last_percent) < self.threshold
+            ):
+                return
+            self.written[media_id] = (now, percent)
+            fields = self.pending.pop(media_id)
+        asyncio.run_coroutine_threadsafe(self.write(media, fields), loop)
+
+    def forget(self, media_id: UUID) -> None:
+        """
+        Drop the throttling state of a media whose download is over.
+
+        :param media_id: (UUID) id of the media
+        :return: None
+        """
+
+        with self.lock:
+            self.pending.pop(media_id, None)
+            self.written.pop(media_id, None)
+
+    @staticmethod
+    async def write(media: Media, fields: dict) -> None:
+        """
+        Save progress fields of a media and publish them to the video pages.
+
+        :param media: (Media) item of db model
+        :param fields: (dict) media fields to update
+        :return: None
+        """
+
+        try:
+            await Media.filter(id=media.id).update(**fields)
+            await video_events.publish(media.id, **fields)
+        except Exception as e:
+            logger.error(f"Progress update error {media.id}: {e}")
+
+
+progress_reporter = ProgressReporter(PROGRESS_INTERVAL, PROGRESS_THRESHOLD)
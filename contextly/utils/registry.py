@@ -0,0 +1,174 @@
+import asyncio
+import time
+
+from contextly.settings import (INFERENCE_EXECUTOR, STAGE_WORKERS,
+                                TORCH_THREADS, TRANSCRIBE_MODEL_WORKERS,
+                                logger)
+from contextly.utils.inference import (ProcessSummarizer, ProcessTranscriber,
+                                       get_rss)
+from contextly.utils.summarizer import Summarizer
+from contextly.utils.transcriber import Transcriber
+
+
+def get_weights_size(model) -> int:
+    """
+    Get the size of torch model weights.
+
+    :param model: torch module
+    :return: (int) size of parameters and buffers in bytes
+    """
+
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+def load_transcriber() -> Transcriber:
+    """
+    Load the Whisper transcriber with its pool of model replicas.
+
+    :return: (Transcriber)
+    """
+
+    return Transcriber(TRANSCRIBE_MODEL_WORKERS)
+
+
+def load_summarizer() -> Summarizer:
+    """
+    Load the T5 summarizer model.
+
+    :return: (Summarizer)
+    """
+
+    summarizer = Summarizer()
+    summarizer._load_model()
+    return summarizer
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of warm inference models.
+
+    Every model is loaded once (in the application lifespan or lazily on first use)
+    and the same instance is shared by all jobs. Models guard their inference
+    with their own lock, so concurrent jobs queue up instead of running
+    the same weights in parallel.
+
+    With the `process` executor the registry hands out proxies to pools
+    of dedicated worker processes, each keeping its own warm model.
+    """
+
+    loaders = {
+        "transcriber": load_transcriber,
+        "summarizer": load_summarizer,
+    }
+    process_models = {  # proxy class, loader run in every worker, number of workers
+        "transcriber": (ProcessTranscriber, Transcriber, TRANSCRIBE_MODEL_WORKERS),
+        "summarizer": (ProcessSummarizer, load_summarizer, STAGE_WORKERS["summarize"]),
+    }
+
+    def __init__(self, executor: str = "thread"):
+        self.executor = executor
+        self.models = {}
+        self.stats = {}
+        self._lock = asyncio.Lock()
+
+    async def get(self, name: str):
+        """
+        Get a warm model by its name, loading it on first use.
+
+        :param name: (str) model name, one of `ModelRegistry.loaders`
+        :return: loaded model instance
+        """
+
+        if name in self.models:
+            return self.models[name]
+        async with self._lock:
+            if name not in self.models:
+                if self.executor == "process":
+                    self.models[name] = await self._start_workers(name)
+                else:
+                    self.models[name] = await asyncio.to_thread(self._load, name)
+        return self.models[name]
+
+    async def get_transcriber(self) -> Transcriber:
+        """
+        Get the shared Whisper transcriber.
+
+        :return: (Transcriber)
+        """
+
+        return await self.get("transcriber")
+
+    async def get_summarizer(self) -> Summarizer:
+        """
+        Get the shared T5 summarizer.
+
+        :return: (Summarizer)
+        """
+
+        return await self.get("summarizer")
+
+    async def load_all(self) -> None:
+        """
+        Load every registered model.
+
+        :return: None
+        """
+
+        for name in self.loaders:
+            await self.get(name)
+
+    def close(self) -> None:
+        """
+        Stop inference worker processes, if any.
+
+        :return: None
+        """
+
+        for model in self.models.values():
+            if hasattr(model, "shutdown"):
+                model.shutdown()
+
+    async def _start_workers(self, name: str):
+        """
+        Start a pool of worker processes for a model and wait until every worker
+        has loaded it, recording the load time and memory usage of each worker.
+
+        :param name: (str) model name
+        :return: process model proxy
+        """
+
+        model_class, loader, workers = self.process_models[name]
+        logger.info(f"Start {workers} inference workers: {name}")
+        model = model_class(loader, workers, TORCH_THREADS)
+        self.stats[name] = {"executor": "process", "workers": await model.warm_up()}
+        logger.info(f"Model {name} loaded: {self.stats[name]}")
+        return model
+
+    def _load(self, name: str):
+        """
+        Load a model and record its load time and memory usage.
+
+        Loads are serialized by the registry lock, so the resident memory delta
+        belongs to this model only.
+
+        :param name: (str) model name
+        :return: loaded model instance
+        """
+
+        logger.info(f"Load model: {name}")
+        rss_before = get_rss()
+        start = time.perf_counter()
+        model = self.loaders[name]()
+        load_time = time.perf_counter() - start
+        rss_delta = max(get_rss() - rss_before, 0)
+        self.stats[name] = {
+            "load_time": round(load_time, 3),
+            "rss_mb": round(rss_delta / 2**20, 1),
+            "weights_mb": round(get_weights_size(model.model) / 2**20, 1),
+        }
+        logger.info(f"Model {name} loaded: {self.stats[name]}")
+        return model
+
+
+registry = ModelRegistry(INFERENCE_EXECUTOR)
@@ -0,0 +1,321 @@
+import asyncio
+import mimetypes
+import os
+import shutil
+import threading
+from typing import List, Optional
+
+from contextly.settings import (DOWNLOADS_DIR, S3_ACCESS_KEY, S3_BUCKET,
+                                S3_ENDPOINT_URL, S3_PART_SIZE, S3_REGION,
+                                S3_SECRET_KEY, STORAGE_BACKEND)
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # the s3 backend is optional
+    boto3 = None
+
+
+class LocalStorage:
+    """
+    Storage of media artifacts on the local disk.
+
+    Artifacts are addressed by keys relative to the storage root, e.g.
+    `{media id}/video/{media id}.mp4`. yt-dlp, ffmpeg and Whisper work on local
+    files, so every backend has a local working copy under `root`; here the
+    working copy is the stored artifact itself.
+    """
+
+    remote = False  # artifacts are served from the working copy
+
+    def __init__(self, root: str):
+        """
+        :param root: (str) directory of the working copy
+        """
+
+        self.root = root
+
+    def local_path(self, key: str) -> str:
+        """
+        Get the working copy path of an artifact.
+
+        :param key: (str) artifact key
+        :return: (str)
+        """
+
+        return os.path.join(self.root, key)
+
+    def _list_local(self, prefix: str) -> List[str]:
+        """
+        List the keys of the working copy files under a prefix.
+
+        :param prefix: (str) key prefix, a directory
+        :return: (List[str]) sorted keys
+        """
+
+        keys = []
+        for dir_path, _, names in os.walk(self.local_path(prefix)):
+            for name in names:
+                path = os.path.relpath(os.path.join(dir_path, name), self.root)
+                keys.append(path.replace(os.sep, "/"))
+        return sorted(keys)
+
+    async def upload(self, key: str) -> None:
+        """
+        Store the working copy of an artifact.
+
+        :param key: (str) artifact key
+        :return: None
+        """
+
+    async def upload_dir(self, prefix: str) -> None:
+        """
+        Store the working copies of all artifacts under a prefix.
+
+        :param prefix: (str) key prefix, a directory
+        :return: None
+        """
+
+        keys = await asyncio.to_thread(self._list_local, prefix)
+        await asyncio.gather(*map(self.upload, keys))
+
+    async def fetch(self, key: str) -> Optional[str]:
+        """
+        Get a working copy of an artifact, downloading it if needed.
+
+        :param key: (str) artifact key
+        :return: (Optional[str]) local path, None if the artifact doesn't exist
+        """
+
+        path = self.local_path(key)
+        return path if await asyncio.to_thread(os.path.isfile, path) else None
+
+    async def exists(self, key: str) -> bool:
+        """
+        Check if an artifact is stored.
+
+        :param key: (str) artifact key
+        :return: (bool)
+        """
+
+        return await asyncio.to_thread(os.path.isfile, self.local_path(key))
+
+    async def list(self, prefix: str) -> List[str]:
+        """
+        List the stored artifacts under a prefix.
+
+        :param prefix: (str) key prefix, a directory
+        :return: (List[str]) sorted keys
+        """
+
+        return await asyncio.to_thread(self._list_local, prefix)
+
+    async def delete(self, prefix: str) -> None:
+        """
+        Delete all artifacts under a prefix, e.g. every file of a media.
+
+        :param prefix: (str) key prefix, a directory
+        :return: None
+        """
+
+        path = self.local_path(prefix)
+        await asyncio.to_thread(shutil.rmtree, path, ignore_errors=True)
+
+
+class S3Storage(LocalStorage):
+    """
+    Storage of media artifacts in an S3-compatible bucket (AWS S3, MinIO, ...).
+
+    The working copy is a local cache: artifacts written by the pipeline are
+    uploaded with streaming multipart uploads, and missing ones are downloaded
+    on `fetch`, so API replicas and processing nodes don't share a disk.
+    The static endpoints read objects directly with ranged or presigned requests.
+    """
+
+    remote = True
+
+    def __init__(
+        self,
+        root: str,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        part_size: int = 16 * 2**20,
+    ):
+        """
+        :param root: (str) directory of the working copy
+        :param bucket: (str) bucket name
+        :param endpoint_url: (Optional[str]) S3-compatible endpoint, AWS if unset
+        :param region: (Optional[str]) bucket region
+        :param access_key: (Optional[str]) access key, from the environment if unset
+        :param secret_key: (Optional[str]) secret key, from the environment if unset
+        :param part_size: (int) multipart upload part size in bytes, at least 5 MiB
+        """
+
+        if boto3 is None:
+            raise RuntimeError("s3 storage requires boto3: pip install contextly[s3]")
+        super().__init__(root)
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+        )
+        self.transfer = TransferConfig(
+            multipart_threshold=part_size, multipart_chunksize=part_size
+        )
+
+    async def upload(self, key: str) -> None:
+        media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+        await asyncio.to_thread(
+            self.client.upload_file,
+            self.local_path(key),
+            self.bucket,
+            key,
+            ExtraArgs={"ContentType": media_type},
+            Config=self.transfer,
+        )
+
+    def _download(self, key: str) -> Optional[str]:
+        """
+        Download an artifact to the working copy, unless it is there already.
+        The file is written under a temporary name and renamed when complete.
+
+        :param key: (str) artifact key
+        :return: (Optional[str]) local path, None if the artifact doesn't exist
+        """
+
+        path = self.local_path(key)
+        if os.path.isfile(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            self.client.download_file(self.bucket, key, tmp_path, Config=self.transfer)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return None
+            raise
+        os.replace(tmp_path, path)
+        return path
+
+    async def fetch(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._download, key)
+
+    async def stat(self, key: str) -> Optional[dict]:
+        """
+        Get the metadata of a stored object.
+
+        :param key: (str) artifact key
+        :return: (Optional[dict]) `head_object` response, None if it doesn't exist
+        """
+
+        try:
+            return await asyncio.to_thread(
+                self.client.head_object, Bucket=self.bucket, Key=key
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return None
+            raise
+
+    async def exists(self, key: str) -> bool:
+        return await self.stat(key) is not None
+
+    def _list_objects(self, prefix: str) -> List[str]:
+        """
+        List the keys of the objects under a prefix.
+
+        :param prefix: (str) key prefix, a directory
+        :return: (List[str]) sorted keys
+        """
+
+        paginator = self.client.get_paginator("list_objects_v2")
+        pages = paginator.paginate(Bucket=self.bucket, Prefix=f"{prefix.rstrip('/')}/")
+        return sorted(
+            item["Key"] for page in pages for item in page.get("Contents", [])
+        )
+
+    async def list(self, prefix: str) -> List[str]:
+        return await asyncio.to_thread(self._list_objects, prefix)
+
+    def _delete_objects(self, prefix: str) -> None:
+        """
+        Delete the objects under a prefix, 1000 per request.
+
+        :param prefix: (str) key prefix, a directory
+        :return: None
+        """
+
+        keys = self._list_objects(prefix)
+        for i in range(0, len(keys), 1000):
+            objects = [{"Key": key} for key in keys[i : i + 1000]]
+            self.client.delete_objects(
+                Bucket=self.bucket, Delete={"Objects": objects, "Quiet": True}
+            )
+
+    async def delete(self, prefix: str) -> None:
+        await asyncio.to_thread(self._delete_objects, prefix)
+        await super().delete(prefix)
+
+    def presigned_url(self, key: str, media_type: str, expires: int) -> str:
+        """
+        Sign a URL for reading an object directly from the bucket.
+
+        :param key: (str) artifact key
+        :param media_type: (str) `Content-Type` of the response
+        :param expires: (int) lifetime of the URL in seconds
+        :return: (str)
+        """
+
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ResponseContentType": media_type,
+            },
+            ExpiresIn=expires,
+        )
+
+    def open(self, key: str, byte_range: Optional[str] = None):
+        """
+        Open a stored object, or a range of it, for streaming.
+
+        :param key: (str) artifact key
+        :param byte_range: (Optional[str]) `Range` header value, e.g. `bytes=0-99`
+        :return: (botocore.response.StreamingBody)
+        """
+
+        params = {"Bucket": self.bucket, "Key": key}
+        if byte_range:
+            params["Range"] = byte_range
+        return self.client.get_object(**params)["Body"]
+
+
+def create_storage() -> LocalStorage:
+    """
+    Create the artifact storage selected by `STORAGE_BACKEND`.
+
+    :return: (LocalStorage) local or s3 storage
+    """
+
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(
+            DOWNLOADS_DIR,
+            S3_BUCKET,
+            endpoint_url=S3_ENDPOINT_URL,
+            region=S3_REGION,
+            access_key=S3_ACCESS_KEY,
+            secret_key=S3_SECRET_KEY,
+            part_size=S3_PART_SIZE,
+        )
+    return LocalStorage(DOWNLOADS_DIR)
+
+
+storage = create_storage()
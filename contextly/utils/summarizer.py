@@ -1,10 +1,15 @@
 import asyncio
+import re
+import threading
+import time
 from pathlib import Path
 from textwrap import wrap
+from typing import List
 
 from transformers import AutoTokenizer, T5ForConditionalGeneration
 
-from contextly.settings import logger
+from contextly.settings import (SUMMARIZE_BATCH_SIZE, SUMMARIZE_MODE,
+                                SUMMARY_TARGET_TOKENS, logger)
 
 
 class Summarizer:
@@ -15,9 +20,21 @@ class Summarizer:
     for input text. It supports chunking long text into manageable pieces for processing.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        batch_size: int = SUMMARIZE_BATCH_SIZE,
+        mode: str = SUMMARIZE_MODE,
+        target_tokens: int = SUMMARY_TARGET_TOKENS,
+    ):
         self.model_path = "contextly/utils/saved_model"
         self.max_chunk_length = 700
+        self.max_chunk_tokens = 512
+        self.max_levels = 8
+        self.batch_size = batch_size
+        self.mode = mode
+        self.target_tokens = target_tokens
+        self.throughput = 0.0  # chunks per second of the last summary
+        self.lock = threading.Lock()
 
     async def load_model(self):
         """
@@ -69,24 +86,127 @@ class Summarizer:
 
     def _get_summary(self, text: str) -> str:
         """
-        Generate a summary for the given text
+        Generate a summary for the given text.
+        The tokenizer and the model are shared by the jobs, and the fast tokenizer
+        changes its truncation and padding settings on every call, so the whole
+        summary is generated under the lock.
 
         :param text: (str) The input text to summarize.
         :return: (str) The generated summary.
         """
 
-        result = []
-        chunks = wrap(text, self.max_chunk_length)
-        for i, chunk in enumerate(chunks):
-            input_ids = self.tokenizer(
-                chunk,
-                return_tensors="pt",
-                truncation=True,
-                max_length=self.max_chunk_length,
-            )["input_ids"]
+        with self.lock:
+            if self.mode == "hierarchical":
+                return self._get_hierarchical_summary(text)
+            chunks = wrap(text, self.max_chunk_length)
+            return " ".join(self.summarize_chunks(chunks))
+
+    def _get_hierarchical_summary(self, text: str) -> str:
+        """
+        Generate a summary by map-reduce: summarize token-sized chunks, then
+        summarize the joined summaries again until they fit `self.target_tokens`.
+
+        Every level shrinks the text by roughly `max_chunk_tokens / 55` times,
+        so the number of levels grows logarithmically with the transcript length.
+
+        :param text: (str) The input text to summarize.
+        :return: (str) The generated summary.
+        """
+
+        for level in range(self.max_levels):
+            chunks = self.split_by_tokens(text)
+            text = " ".join(self.summarize_chunks(chunks))
+            logger.info(f"Summary level {level}: {len(chunks)} chunks")
+            if len(chunks) <= 1 or self.count_tokens(text) <= self.target_tokens:
+                break
+        return text
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Count tokenizer tokens in a text.
+
+        :param text: (str) The input text.
+        :return: (int) number of tokens.
+        """
+
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def split_by_tokens(self, text: str) -> List[str]:
+        """
+        Split text into chunks of at most `self.max_chunk_tokens` tokens
+        at sentence boundaries. Sentences longer than a chunk are cut by tokens.
+
+        :param text: (str) The input text.
+        :return: (List[str]) text chunks.
+        """
+
+        sentences = [s for s in re.split(r"(?<=[.!?…])\s+", text.strip()) if s]
+        if not sentences:
+            return []
+        sentences_ids = self.tokenizer(sentences, add_special_tokens=False)["input_ids"]
+        chunks = []
+        chunk, chunk_tokens = [], 0
+        for sentence, ids in zip(sentences, sentences_ids):
+            if len(ids) > self.max_chunk_tokens:
+                if chunk:
+                    chunks.append(" ".join(chunk))
+                    chunk, chunk_tokens = [], 0
+                for i in range(0, len(ids), self.max_chunk_tokens):
+                    chunks.append(
+                        self.tokenizer.decode(
+                            ids[i : i + self.max_chunk_tokens],
+                            skip_special_tokens=True,
+                        )
+                    )
+                continue
+            if chunk_tokens + len(ids) > self.max_chunk_tokens:
+                chunks.append(" ".join(chunk))
+                chunk, chunk_tokens = [], 0
+            chunk.append(sentence)
+            chunk_tokens += len(ids)
+        if chunk:
+            chunks.append(" ".join(chunk))
+        return chunks
+
+    def summarize_chunks(self, chunks: List[str]) -> List[str]:
+        """
+        Generate a summary for every chunk, running `generate` over batches.
+
+        All chunks are tokenized together, sorted by token length so that every
+        batch is padded to a similar length, and the summaries are returned
+        in the original chunk order.
+
+        :param chunks: (List[str]) text chunks to summarize.
+        :return: (List[str]) summary of every chunk.
+        """
+
+        if not chunks:
+            return []
+        start = time.perf_counter()
+        input_ids = self.tokenizer(
+            chunks, truncation=True, max_length=self.max_chunk_length
+        )["input_ids"]
+        order = sorted(range(len(chunks)), key=lambda i: len(input_ids[i]))
+        result = [""] * len(chunks)
+        for i in range(0, len(order), self.batch_size):
+            batch = order[i : i + self.batch_size]
+            inputs = self.tokenizer.pad(
+                {"input_ids": [input_ids[j] for j in batch]}, return_tensors="pt"
+            )
             output_ids = self.model.generate(
-                input_ids=input_ids, max_length=55, no_repeat_ngram_size=4
+                input_ids=inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                max_length=55,
+                no_repeat_ngram_size=4,
+            )
+            summaries = self.tokenizer.batch_decode(
+                output_ids, skip_special_tokens=True
             )
-            summary = self.tokenizer.decode(output_ids[0], skip_special_tokens=True)
-            result.append(summary)
-        return " ".join(result)
+            for j, summary in zip(batch, summaries):
+                result[j] = summary
+        self.throughput = len(chunks) / (time.perf_counter() - start)
+        logger.info(
+            f"Summarized {len(chunks)} chunks, batch size {self.batch_size}: "
+            f"{self.throughput:.2f} chunks/s"
+        )
+        return result
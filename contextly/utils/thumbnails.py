@@ -0,0 +1,144 @@
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, features
+
+THUMBNAIL_FORMATS = {  # format -> (Pillow format, file suffix), preferred first
+    "image/avif": ("AVIF", ".avif"),
+    "image/webp": ("WEBP", ".webp"),
+    "image/jpeg": ("JPEG", ".jpg"),
+}
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """
+    Choose the image format of a thumbnail variant from an `Accept` header.
+
+    AVIF and WebP are only sent to clients listing them, since `*/*` is also
+    sent by clients that can't decode them. JPEG is the fallback.
+
+    :param accept: (Optional[str]) value of the `Accept` header
+    :return: (str) media type, a key of `THUMBNAIL_FORMATS`
+    """
+
+    accepted = set()
+    for item in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        q = next((p[2:] for p in params if p.startswith("q=")), "1")
+        try:
+            if float(q) > 0:
+                accepted.add(media_type.lower())
+        except ValueError:
+            continue
+    if "image/avif" in accepted and features.check("avif"):
+        return "image/avif"
+    if "image/webp" in accepted:
+        return "image/webp"
+    return "image/jpeg"
+
+
+def resize_image(source_path: Path, size: int, media_type: str, quality: int) -> bytes:
+    """
+    Scale an image down to fit a square of `size` pixels, keeping the aspect ratio.
+
+    :param source_path: (Path) Path to the original image.
+    :param size: (int) longest side of the variant, pixels
+    :param media_type: (str) format of the variant, a key of `THUMBNAIL_FORMATS`
+    :param quality: (int) encoder quality, 0-100
+    :return: (bytes) encoded image
+    """
+
+    image_format, _ = THUMBNAIL_FORMATS[media_type]
+    with Image.open(source_path) as image:
+        image = image.convert("RGB")
+    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, quality=quality)
+    return buffer.getvalue()
+
+
+class ThumbnailCache:
+    """
+    Disk cache of thumbnail variants with least recently used eviction.
+
+    The index is loaded from the cache directory on first use, ordered by
+    access time, so recency survives restarts. Hits update the access time only,
+    which keeps `Last-Modified` and `ETag` of cached files stable.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        """
+        :param path: (str) cache directory
+        :param max_bytes: (int) total size of cached files to keep
+        """
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.entries: Optional[OrderedDict] = None  # file name -> size, oldest first
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def _load(self) -> None:
+        """
+        Index the files of the cache directory.
+        """
+
+        os.makedirs(self.path, exist_ok=True)
+        files = [
+            (entry.stat().st_atime, entry.name, entry.stat().st_size)
+            for entry in os.scandir(self.path)
+            if entry.is_file() and not entry.name.endswith(".tmp")
+        ]
+        self.entries = OrderedDict((name, size) for _, name, size in sorted(files))
+        self.size = sum(self.entries.values())
+
+    def get(self, name: str) -> Optional[Path]:
+        """
+        Get a cached file and mark it as recently used.
+
+        :param name: (str) file name
+        :return: (Optional[Path]) the file if it is cached
+        """
+
+        with self.lock:
+            if self.entries is None:
+                self._load()
+            if name not in self.entries:
+                return None
+            path = Path(self.path, name)
+            try:
+                os.utime(path, (time.time(), path.stat().st_mtime))
+            except FileNotFoundError:
+                self.size -= self.entries.pop(name)
+                return None
+            self.entries.move_to_end(name)
+            return path
+
+    def put(self, name: str, data: bytes) -> Path:
+        """
+        Cache a file and evict the least recently used ones over the budget.
+
+        :param name: (str) file name
+        :param data: (bytes) file content
+        :return: (Path) the cached file
+        """
+
+        path = Path(self.path, name)
+        with self.lock:
+            if self.entries is None:
+                self._load()
+            tmp_path = Path(self.path, f"{name}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+            self.size += len(data) - self.entries.pop(name, 0)
+            self.entries[name] = len(data)
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                old_name, old_size = self.entries.popitem(last=False)
+                self.size -= old_size
+                Path(self.path, old_name).unlink(missing_ok=True)
+        return path
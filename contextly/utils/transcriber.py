@@ -1,42 +1,170 @@
 import asyncio
 import os
-from typing import List
+import queue
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional, Union
 
 import whisper
 
+from contextly.utils.audio import SAMPLE_RATE, PcmChunk
+from contextly.utils.vad import SpeechChunk
 
-class Transcriber:
+
+class BaseTranscriber(ABC):
+    """
+    Base class of the transcribers: the audio of a video is transcribed chunk
+    by chunk with `transcribe_chunk`, which subclasses implement.
+    """
+
+    @abstractmethod
+    async def transcribe_chunk(
+        self, audio: Union[os.PathLike, PcmChunk, SpeechChunk], offset: float = 0.0
+    ) -> List[dict]:
+        """
+        Transcribe one audio chunk.
+
+        :param audio: (os.PathLike | PcmChunk | SpeechChunk) audio file, PCM chunk
+            or its speech windows
+        :param offset: (float) start of the chunk in the video, seconds
+        :return: (List[dict]) segments with `start`, `end` and `text`
+        """
+
+    async def transcribe(
+        self,
+        audios_path: List[Union[os.PathLike, PcmChunk, SpeechChunk]],
+        progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+        chunk_duration: int = 600,
+        done_chunks: Optional[Dict[int, List[dict]]] = None,
+        on_chunk: Optional[Callable[[int, List[dict]], Awaitable[None]]] = None,
+    ) -> List[dict]:
+        """
+        Transcribe audio chunks with `transcribe_chunk`.
+        Chunks are transcribed concurrently and their segments are joined back
+        in chunk order, with timestamps counted from the start of the video.
+
+        :param audios_path: (List[os.PathLike | PcmChunk | SpeechChunk]) audio files,
+            PCM chunks or their speech windows
+        :param progress: (Callable) coroutine called with the number
+            of transcribed chunks and the total number of chunks
+        :param chunk_duration: (int) duration of audio chunks in seconds
+        :param done_chunks: (Dict[int, List[dict]]) segments of chunks transcribed
+            before, by chunk number, which are not transcribed again
+        :param on_chunk: (Callable) coroutine called with the number and the segments
+            of each chunk when it is transcribed
+        :return: (List[dict]) segments with `start`, `end` and `text`
+        """
+
+        done_chunks = done_chunks or {}
+        done = len(done_chunks)
+
+        async def transcribe_chunk(i: int) -> List[dict]:
+            nonlocal done
+            if i in done_chunks:
+                return done_chunks[i]
+            segments = await self.transcribe_chunk(audios_path[i], i * chunk_duration)
+            if on_chunk:
+                await on_chunk(i, segments)
+            done += 1
+            if progress:
+                await progress(done, len(audios_path))
+            return segments
+
+        chunks = await asyncio.gather(*map(transcribe_chunk, range(len(audios_path))))
+        return [segment for segments in chunks for segment in segments]
+
+
+class Transcriber(BaseTranscriber):
     """
     Transcriber class for transcribing audio files into text using the Whisper model.
 
     This class provides methods to transcribe audio files asynchronously and synchronously,
-    leveraging OpenAI's Whisper model.
+    leveraging OpenAI's Whisper model. It keeps a bounded pool of model replicas,
+    so the chunks of a long audio are transcribed concurrently.
     """
 
-    def __init__(self):
-        self.model = whisper.load_model("base")
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+        self.models = queue.Queue()
+        for _ in range(workers):
+            self.models.put(whisper.load_model("base"))
+        self.model = self.models.queue[0]
+        self.slots = asyncio.Semaphore(workers)
 
-    async def transcribe(self, audios_path: List[os.PathLike]) -> str:
+    async def transcribe_chunk(
+        self, audio: Union[os.PathLike, PcmChunk, SpeechChunk], offset: float = 0.0
+    ) -> List[dict]:
         """
-        Wrapper for function to transcribe audio using Whisper
+        Transcribe one audio chunk when a model replica is free.
+        Used directly to transcribe chunks of a stream as they arrive.
 
-        :param audios_path: (List[os.PathLike]) path to audio file
-        :return: (str)
+        :param audio: (os.PathLike | PcmChunk | SpeechChunk) audio file, PCM chunk
+            or its speech windows
+        :param offset: (float) start of the chunk in the video, seconds
+        :return: (List[dict]) segments with `start`, `end` and `text`
         """
+
         loop = asyncio.get_event_loop()
-        text = await loop.run_in_executor(None, self._transcribe, audios_path)
-        return text
+        async with self.slots:
+            return await loop.run_in_executor(
+                None, self._transcribe_chunk, audio, offset
+            )
 
-    def _transcribe(self, audios_path: List[os.PathLike]) -> str:
+    def _transcribe(
+        self,
+        audios_path: List[Union[os.PathLike, PcmChunk, SpeechChunk]],
+        chunk_duration: int = 600,
+    ) -> List[dict]:
         """
         Function to transcribe audio using Whisper
 
-        :param audios_path: (List[os.PathLike]) path to audio file
-        :return:
+        :param audios_path: (List[os.PathLike | PcmChunk | SpeechChunk]) audio files,
+            PCM chunks or their speech windows
+        :param chunk_duration: (int) duration of audio chunks in seconds
+        :return: (List[dict]) segments with `start`, `end` and `text`
         """
-        result = ""
-        for file_path in audios_path:
-            audio = whisper.load_audio(f"{os.getcwd()}/{file_path}")
-            chunk = self.model.transcribe(audio)
-            result += chunk["text"]
-        return result
+        return [
+            segment
+            for i, file_path in enumerate(audios_path)
+            for segment in self._transcribe_chunk(file_path, i * chunk_duration)
+        ]
+
+    def _transcribe_chunk(
+        self, file_path: Union[os.PathLike, PcmChunk, SpeechChunk], offset: float = 0.0
+    ) -> List[dict]:
+        """
+        Transcribe a single audio file or decoded audio chunk
+        with a free model replica. Only the speech windows of a chunk
+        reduced by the voice activity detector are transcribed.
+
+        :param file_path: (os.PathLike | PcmChunk | SpeechChunk) path to audio file,
+            PCM chunk or its speech windows
+        :param offset: (float) start of the chunk in the video, seconds
+        :return: (List[dict]) segments with `start`, `end` and `text`
+        """
+
+        if isinstance(file_path, SpeechChunk):
+            return [
+                segment
+                for window in file_path.windows
+                for segment in self._transcribe_chunk(
+                    window,
+                    offset + (window.start - file_path.chunk.start) / SAMPLE_RATE,
+                )
+            ]
+        if isinstance(file_path, PcmChunk):
+            audio = file_path.load()
+        else:
+            audio = whisper.load_audio(os.path.abspath(file_path))
+        model = self.models.get()
+        try:
+            chunk = model.transcribe(audio)
+        finally:
+            self.models.put(model)
+        return [
+            {
+                "start": round(offset + segment["start"], 2),
+                "end": round(offset + segment["end"], 2),
+                "text": segment["text"],
+            }
+            for segment in chunk["segments"]
+        ]
@@ -0,0 +1,183 @@
+import json
+from typing import Dict, List, Tuple, Union
+from uuid import UUID
+
+from tortoise.transactions import in_transaction
+
+from contextly.models.media import Media
+from contextly.models.transcript import TranscriptBlock, TranscriptChunk
+from contextly.settings import TRANSCRIPT_BLOCK_SIZE, TRANSCRIPT_COMPRESSION
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
+
+
+def encode_block(segments: List[dict], compression: str) -> bytes:
+    """
+    Serialize transcript segments of a block.
+
+    :param segments: (List[dict]) segments with `start`, `end` and `text`
+    :param compression: (str) zstd or none
+    :return: (bytes)
+    """
+
+    data = json.dumps(segments, ensure_ascii=False).encode()
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def decode_block(block: Union[TranscriptBlock, TranscriptChunk]) -> List[dict]:
+    """
+    Deserialize transcript segments of a block.
+
+    :param block: (TranscriptBlock | TranscriptChunk) item of db model
+    :return: (List[dict]) segments with `start`, `end` and `text`
+    """
+
+    data = block.data
+    if block.compression == "zstd":
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return json.loads(data)
+
+
+async def save_chunk(media: Media, index: int, segments: List[dict]) -> None:
+    """
+    Save the segments of a transcribed audio chunk as soon as it is done,
+    so a retried pipeline only transcribes the missing chunks.
+
+    :param media: (Media) item of db model
+    :param index: (int) audio chunk number
+    :param segments: (List[dict]) segments with `start`, `end` and `text`
+    :return: None
+    """
+
+    compression = TRANSCRIPT_COMPRESSION if zstandard else "none"
+    await TranscriptChunk.update_or_create(
+        media_id=media.id,
+        index=index,
+        defaults={
+            "compression": compression,
+            "data": encode_block(segments, compression),
+        },
+    )
+
+
+async def get_chunks(media_id: UUID) -> Dict[int, List[dict]]:
+    """
+    Get the segments of the audio chunks of a media transcribed so far.
+
+    :param media_id: (UUID) id of the media
+    :return: (Dict[int, List[dict]]) segments by audio chunk number
+    """
+
+    chunks = await TranscriptChunk.filter(media_id=media_id)
+    return {chunk.index: decode_block(chunk) for chunk in chunks}
+
+
+async def save_transcript(media: Media, segments: List[dict]) -> None:
+    """
+    Replace the transcript of a media with timestamped segments,
+    stored in blocks of `TRANSCRIPT_BLOCK_SIZE` segments.
+    The saved audio chunks are merged into the blocks and deleted.
+
+    :param media: (Media) item of db model
+    :param segments: (List[dict]) segments with `start`, `end` and `text`
+    :return: None
+    """
+
+    compression = TRANSCRIPT_COMPRESSION if zstandard else "none"
+    blocks = [
+        TranscriptBlock(
+            media_id=media.id,
+            index=i // TRANSCRIPT_BLOCK_SIZE,
+            start=block[0]["start"],
+            end=block[-1]["end"],
+            segments=len(block),
+            compression=compression,
+            data=encode_block(block, compression),
+        )
+        for i in range(0, len(segments), TRANSCRIPT_BLOCK_SIZE)
+        for block in [segments[i : i + TRANSCRIPT_BLOCK_SIZE]]
+    ]
+    async with in_transaction():
+        await TranscriptBlock.filter(media_id=media.id).delete()
+        await TranscriptBlock.bulk_create(blocks)
+        await TranscriptChunk.filter(media_id=media.id).delete()
+
+
+async def get_transcript_page(media_id: UUID, page: int) -> Tuple[List[dict], int]:
+    """
+    Get one page of the transcript of a media.
+
+    :param media_id: (UUID) id of the media
+    :param page: (int) page number, starting from 0
+    :return: (Tuple[List[dict], int]) segments of the page and the number of pages
+    """
+
+    pages = await TranscriptBlock.filter(media_id=media_id).count()
+    block = await TranscriptBlock.filter(media_id=media_id, index=page).first()
+    return (decode_block(block) if block else []), pages
+
+
+async def get_segments(media_id: UUID) -> List[dict]:
+    """
+    Get all transcript segments of a media.
+
+    :param media_id: (UUID) id of the media
+    :return: (List[dict]) segments with `start`, `end` and `text`
+    """
+
+    blocks = await TranscriptBlock.filter(media_id=media_id).order_by("index")
+    return [segment for block in blocks for segment in decode_block(block)]
+
+
+def format_timestamp(seconds: float, separator: str) -> str:
+    """
+    Format a subtitle timestamp, e.g. `00:01:02.345`.
+
+    :param seconds: (float) time from the start of the video
+    :param separator: (str) separator of milliseconds, `.` for VTT and `,` for SRT
+    :return: (str)
+    """
+
+    milliseconds = round(seconds * 1000)
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
+
+
+def to_vtt(segments: List[dict]) -> str:
+    """
+    Format transcript segments as WebVTT subtitles.
+
+    :param segments: (List[dict]) segments with `start`, `end` and `text`
+    :return: (str)
+    """
+
+    cues = [
+        f"{format_timestamp(s['start'], '.')} --> {format_timestamp(s['end'], '.')}\n"
+        f"{s['text'].strip()}\n"
+        for s in segments
+    ]
+    return "\n".join(["WEBVTT\n", *cues])
+
+
+def to_srt(segments: List[dict]) -> str:
+    """
+    Format transcript segments as SRT subtitles.
+
+    :param segments: (List[dict]) segments with `start`, `end` and `text`
+    :return: (str)
+    """
+
+    cues = [
+        f"{i}\n"
+        f"{format_timestamp(s['start'], ',')} --> {format_timestamp(s['end'], ',')}\n"
+        f"{s['text'].strip()}\n"
+        for i, s in enumerate(segments, 1)
+    ]
+    return "\n".join(cues)
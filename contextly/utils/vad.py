@@ -0,0 +1,127 @@
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+
+from contextly.settings import (VAD_MIN_SILENCE, VAD_MIN_SPEECH, VAD_PADDING,
+                                VAD_THRESHOLD_DB, VAD_WINDOW)
+from contextly.utils.audio import SAMPLE_RATE, PcmChunk
+
+FRAME_SIZE = SAMPLE_RATE * 30 // 1000  # samples in a 30 ms analysis frame
+
+
+class SpeechChunk(NamedTuple):
+    """
+    Audio chunk reduced to its speech windows by the voice activity detector.
+
+    Windows keep their position in the audio file, so segments transcribed
+    from them are timestamped from the start of the video.
+    """
+
+    chunk: PcmChunk  # the whole chunk
+    windows: List[PcmChunk]  # speech windows of the chunk, in order
+
+    @property
+    def speech_frames(self) -> int:
+        """
+        Number of samples sent to the transcriber.
+
+        :return: (int)
+        """
+
+        return sum(window.frames for window in self.windows)
+
+
+def frame_levels(audio: np.ndarray) -> np.ndarray:
+    """
+    Measure the loudness of every analysis frame of an audio.
+
+    :param audio: (np.ndarray) float32 samples
+    :return: (np.ndarray) RMS level of each frame in dBFS
+    """
+
+    count = -(-len(audio) // FRAME_SIZE)
+    frames = np.zeros(count * FRAME_SIZE, dtype=np.float32)
+    frames[: len(audio)] = audio
+    power = np.mean(np.square(frames.reshape(count, FRAME_SIZE), dtype=np.float64), 1)
+    return 10 * np.log10(power + 1e-12)
+
+
+def speech_regions(
+    audio: np.ndarray,
+    threshold_db: float = VAD_THRESHOLD_DB,
+    min_silence: float = VAD_MIN_SILENCE,
+    min_speech: float = VAD_MIN_SPEECH,
+    padding: float = VAD_PADDING,
+) -> List[Tuple[int, int]]:
+    """
+    Find the speech regions of an audio with an energy detector.
+
+    Frames louder than `threshold_db` are voiced. Voiced frames separated
+    by less than `min_silence` seconds are merged into one region, so pauses
+    between words and sentences stay in the window Whisper sees, and regions
+    shorter than `min_speech` seconds, e.g. clicks, are dropped.
+
+    :param audio: (np.ndarray) float32 samples
+    :param threshold_db: (float) level of speech frames in dBFS
+    :param min_silence: (float) shortest silence skipped, seconds
+    :param min_speech: (float) shortest speech region kept, seconds
+    :param padding: (float) audio kept before and after each region, seconds
+    :return: (List[Tuple[int, int]]) first and end sample of each region
+    """
+
+    voiced = np.flatnonzero(frame_levels(audio) > threshold_db)
+    if not voiced.size:
+        return []
+    frame_duration = FRAME_SIZE / SAMPLE_RATE
+    min_gap = max(min_silence, 2 * padding) / frame_duration  # padded don't overlap
+    gaps = np.flatnonzero(np.diff(voiced) > min_gap)
+    starts = voiced[np.r_[0, gaps + 1]]
+    ends = voiced[np.r_[gaps, len(voiced) - 1]] + 1
+    pad = int(padding * SAMPLE_RATE)
+    return [
+        (max(0, start * FRAME_SIZE - pad), min(len(audio), end * FRAME_SIZE + pad))
+        for start, end in zip(starts.tolist(), ends.tolist())
+        if (end - start) * frame_duration >= min_speech
+    ]
+
+
+def pack_regions(
+    regions: List[Tuple[int, int]], window: float = VAD_WINDOW
+) -> List[Tuple[int, int]]:
+    """
+    Pack consecutive speech regions into windows of up to `window` seconds.
+
+    Whisper pads every input to a 30 s window, so transcribing each short region
+    on its own costs a full encoder pass and loses the context of the previous
+    text. A window spans its regions with the pauses between them; a region
+    longer than `window` is a window of its own.
+
+    :param regions: (List[Tuple[int, int]]) first and end sample of each region
+    :param window: (float) longest window, seconds
+    :return: (List[Tuple[int, int]]) first and end sample of each window
+    """
+
+    windows = []
+    for start, end in regions:
+        if windows and end - windows[-1][0] <= window * SAMPLE_RATE:
+            windows[-1] = (windows[-1][0], end)
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def find_speech(chunk: PcmChunk, window: float = VAD_WINDOW, **options) -> SpeechChunk:
+    """
+    Reduce a decoded audio chunk to its speech windows.
+
+    :param chunk: (PcmChunk) audio chunk
+    :param window: (float) longest window of packed speech regions, seconds
+    :param options: options of `speech_regions`
+    :return: (SpeechChunk)
+    """
+
+    regions = pack_regions(speech_regions(chunk.load(), **options), window)
+    windows = [
+        PcmChunk(chunk.path, chunk.start + start, end - start) for start, end in regions
+    ]
+    return SpeechChunk(chunk, windows)
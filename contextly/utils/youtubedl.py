@@ -1,15 +1,34 @@
 import asyncio
+import functools
 import math
 import os
-import re
+from pathlib import PurePosixPath
+from typing import Dict, List, Optional, Tuple
 
 import ffmpeg
+from starlette.concurrency import iterate_in_threadpool
 from yt_dlp import YoutubeDL
 
-from contextly.models.video import Video
-from contextly.settings import logger
-from contextly.utils.summarizer import Summarizer
-from contextly.utils.transcriber import Transcriber
+from contextly.models.media import Media
+from contextly.settings import (AUDIO_MODE, HLS_ENABLED, HLS_LOW_HEIGHT,
+                                HLS_SEGMENT_SECONDS, PIPELINE_MODE,
+                                SUMMARIZE_MODE, VAD_ENABLED, logger)
+from contextly.utils.audio import (SAMPLE_RATE, SAMPLE_SIZE, PcmChunk,
+                                   decode_pcm, decode_stream, split_pcm,
+                                   stream_pcm)
+from contextly.utils.events import video_events
+from contextly.utils.hls import MASTER_PLAYLIST, build_hls
+from contextly.utils.jobs import job_queue
+from contextly.utils.progress import progress_reporter
+from contextly.utils.registry import registry
+from contextly.utils.storage import storage
+from contextly.utils.transcripts import (get_chunks, get_segments, save_chunk,
+                                         save_transcript)
+from contextly.utils.vad import SpeechChunk, find_speech
+
+PIPELINE_STAGES = ["download", "extract", "transcribe", "summarize"]  # in order
+
+video_fetches: Dict[str, asyncio.Task] = {}  # media id -> running video fetch
 
 
 class YouTubeDl:
@@ -18,8 +37,22 @@ class YouTubeDl:
     extract audio, transcribe, and summarize content.
     """
 
-    def __init__(self, chunk_duration: int = 600):
+    formats = {
+        "video": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/mp4",
+        "audio": "bestaudio[ext=m4a]/bestaudio",
+    }
+
+    def __init__(
+        self,
+        chunk_duration: int = 600,
+        audio_mode: str = AUDIO_MODE,
+        pipeline_mode: str = PIPELINE_MODE,
+        vad: bool = VAD_ENABLED,
+    ):
         self.chunk_duration = chunk_duration
+        self.audio_mode = audio_mode
+        self.pipeline_mode = pipeline_mode
+        self.vad = vad
 
     @staticmethod
     async def get_video_duration(video_path: str) -> float:
@@ -42,6 +75,8 @@ class YouTubeDl:
         This function extracts a specific chunk of audio from the input video file
         starting at the given time and saves it to the specified output path in MP3 format.
         The chunk duration is determined by the `self.chunk_duration` attribute.
+        The chunk is written under a temporary name and renamed when complete,
+        so a chunk left by a previous run is complete and is reused.
 
         :param start_time: (int) The start time of the audio chunk in seconds.
         :param video_path: (str) The path to the input video file.
@@ -49,11 +84,15 @@ class YouTubeDl:
         :return None
         """
 
+        if await asyncio.to_thread(os.path.exists, output_path):
+            logger.info(f"Reused: {output_path}")
+            return
         await asyncio.to_thread(
             lambda: ffmpeg.input(video_path, ss=start_time, t=self.chunk_duration)
-            .output(output_path, format="mp3", **{"q:a": 0})
+            .output(f"{output_path}.tmp", format="mp3", **{"q:a": 0})
             .run(overwrite_output=True)
         )
+        os.replace(f"{output_path}.tmp", output_path)
         logger.info(f"Saved: {output_path}")
 
     async def split_audio(self, video_path: str, output_path: str) -> list:
@@ -64,7 +103,7 @@ class YouTubeDl:
         :param output_path: (str) Path to save audio,
         """
 
-        os.mkdir(output_path)
+        os.makedirs(output_path, exist_ok=True)
         total_duration = await self.get_video_duration(video_path)
         num_chunks = math.ceil(total_duration / self.chunk_duration)
 
@@ -80,121 +119,554 @@ class YouTubeDl:
         await asyncio.gather(*tasks)
         return files
 
-    def dl_progress_hook(self, data: dict) -> None:
+    async def extract_pcm(self, video_path: str, output_path: str) -> List[PcmChunk]:
         """
-        Synchronous function for handling video processing progress callback
+        Decode a video's audio once into a 16 kHz mono float32 file
+        and split it into chunks without copying the samples.
 
-        :param data: (dict) video processing progress
+        :param video_path: (str) Path to video file.
+        :param output_path: (str) Path to save audio,
+        :return: (List[PcmChunk]) audio chunks
+        """
+
+        os.makedirs(output_path, exist_ok=True)
+        pcm_path = f"{output_path}audio.f32"
+        if os.path.exists(pcm_path):
+            frames = os.path.getsize(pcm_path) // SAMPLE_SIZE
+            logger.info(f"Reused: {pcm_path}")
+        else:
+            frames = await asyncio.to_thread(decode_pcm, video_path, pcm_path)
+            logger.info(f"Saved: {pcm_path}")
+        return split_pcm(pcm_path, frames, self.chunk_duration)
+
+    @staticmethod
+    async def remove_pcm(media: Media) -> None:
+        """
+        Delete the decoded audio of a media once it is transcribed.
+        It is only read by Whisper and takes about twice the space of MP3 chunks.
+
+        :param media: (Media) item of db model
         :return: None
         """
 
-        dl_progress = 0
-        try:
-            if data["status"] == "downloading" and data["total_bytes"] > 0:
-                dl_progress = int(data["downloaded_bytes"] / data["total_bytes"] * 100)
-        except Exception as e:
-            logger.error(f"Error percent count: {e}")
-        info = {
-            "status": data["status"],
-            "filename": data["filename"],
-            "title": data["info_dict"]["title"],
-            "dl_progress": dl_progress,
-        }
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(self.async_dl_progress_hook(info))
+        for name in ("audio.f32", "stream.f32"):
+            path = storage.local_path(f"{media.id}/audio/{name}")
+            if await asyncio.to_thread(os.path.exists, path):
+                await asyncio.to_thread(os.remove, path)
+                logger.info(f"Removed: {path}")
 
     @staticmethod
-    async def async_dl_progress_hook(info: dict) -> None:
+    async def save_speech_stats(media: Media, chunks: List[SpeechChunk]) -> None:
         """
-        Processing video processing progress and saving status
+        Save how much audio of a video the voice activity detector skipped.
 
-        :param info: (dict) processing data
+        :param media: (Media) item of db model
+        :param chunks: (List[SpeechChunk]) audio chunks reduced to speech windows
         :return: None
         """
 
-        uuid_pattern = r"[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}"
-        id = re.findall(uuid_pattern, info["filename"])[0]
-        video = await Video.filter(id=id).first()
-        if info.get("title"):
-            video.title = info["title"]
-        if info["status"] == "downloading":
-            video.status = f"""{info["status"]}-{info["dl_progress"]}%"""
-        else:
-            video.status = f"""{info["status"]}"""
-        await video.save()
+        media.audio_seconds = sum(c.chunk.frames for c in chunks) / SAMPLE_RATE
+        media.speech_seconds = sum(c.speech_frames for c in chunks) / SAMPLE_RATE
+        await Media.filter(id=media.id).update(
+            audio_seconds=media.audio_seconds, speech_seconds=media.speech_seconds
+        )
+        logger.info(
+            f"VAD {media.id}: {media.audio_seconds - media.speech_seconds:.0f}s "
+            f"of {media.audio_seconds:.0f}s skipped"
+        )
 
-    async def download_video_with_async_hook(self, video: Video) -> None:
+    async def detect_speech(
+        self, media: Media, chunks: List[PcmChunk]
+    ) -> List[SpeechChunk]:
         """
-        Download a video and its thumbnail, extract audio, transcribe, and summarize content.
+        Reduce decoded audio chunks to their speech windows, so silence
+        and quiet stretches are not transcribed.
 
-        This function handles the entire video processing pipeline, which includes:
-        - Downloading the video and its thumbnail using `YoutubeDL`.
-        - Extracting audio from the downloaded video and splitting it into chunks.
-        - Transcribing the audio into text.
-        - Summarizing the transcribed text into a concise description.
+        :param media: (Media) item of db model
+        :param chunks: (List[PcmChunk]) audio chunks
+        :return: (List[SpeechChunk]) chunks with their speech windows
+        """
+
+        speech = await asyncio.to_thread(lambda: [find_speech(c) for c in chunks])
+        await self.save_speech_stats(media, speech)
+        return speech
+
+    @staticmethod
+    def dl_progress_hook(
+        media: Media, loop: asyncio.AbstractEventLoop, data: dict
+    ) -> None:
+        """
+        Synchronous function for handling video processing progress callback.
+        Called from the downloader thread, it hands the progress to the throttled
+        reporter running on the main event loop.
 
-        :param video: (Video) item of db model
+        :param media: (Media) item of db model
+        :param loop: (asyncio.AbstractEventLoop) main event loop
+        :param data: (dict) video processing progress
+        :return: None
+        """
+
+        dl_progress = None
+        status = data["status"]
+        try:
+            total_bytes = data.get("total_bytes") or data.get("total_bytes_estimate")
+            if status == "downloading" and total_bytes:
+                dl_progress = int(data["downloaded_bytes"] / total_bytes * 100)
+                status = f"{status}-{dl_progress}%"
+        except Exception as e:
+            logger.error(f"Error percent count: {e}")
+        progress_reporter.report(
+            loop,
+            media,
+            dl_progress,
+            status=status,
+            title=data["info_dict"]["title"],
+        )
+
+    @staticmethod
+    async def download_thumbnail(media: Media) -> None:
+        """
+        Download the thumbnail of a video and store it.
+
+        :param media: (Media) item of db model
         :return: None
         """
 
         options = {
-            "quiet": True,
-            "format": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/mp4",
-            "outtmpl": f"downloads/{video.id}/video/{video.id}.%(ext)s",
-            "progress_hooks": [self.dl_progress_hook],
-        }
-        thumbnail_options = {
             "quiet": True,
             "writethumbnail": True,
             "skip_download": True,
-            "outtmpl": f"downloads/{video.id}/img/{video.id}.%(ext)s",
+            "outtmpl": storage.local_path(f"{media.id}/img/{media.id}.%(ext)s"),
         }
         loop = asyncio.get_event_loop()
-
-        logger.info(f"Download thumbnail start: {video.id} {video.url}")
-        with YoutubeDL(thumbnail_options) as ydl:
+        logger.info(f"Download thumbnail start: {media.id} {media.url}")
+        with YoutubeDL(options) as ydl:
             try:
-                await loop.run_in_executor(None, ydl.download, [video.url])
+                await loop.run_in_executor(None, ydl.download, [media.url])
             except Exception as e:
                 logger.error(f"YoutubeDL error load thumbnail error: {e}")
+                return
+        await storage.upload_dir(f"{media.id}/img")
 
-        logger.info(f"Download video start: {video.id} {video.url}")
+    async def download_media(
+        self, media: Media, stream: str, progress: bool = True
+    ) -> Optional[str]:
+        """
+        Download the video (with its audio) or only the audio stream of a video,
+        and store it.
+
+        :param media: (Media) item of db model
+        :param stream: (str) `video` or `audio`
+        :param progress: (bool) save download progress to the media status
+        :return: (Optional[str]) path of the downloaded file
+        """
+
+        options = {
+            "quiet": True,
+            "format": self.formats[stream],
+            "outtmpl": storage.local_path(f"{media.id}/{stream}/{media.id}.%(ext)s"),
+        }
+        loop = asyncio.get_event_loop()
+        if progress:
+            hook = functools.partial(self.dl_progress_hook, media, loop)
+            options["progress_hooks"] = [hook]
+        logger.info(f"Download {stream} start: {media.id} {media.url}")
         with YoutubeDL(options) as ydl:
             try:
-                await asyncio.shield(
-                    loop.run_in_executor(None, ydl.download, [video.url])
+                info = await asyncio.shield(
+                    loop.run_in_executor(None, ydl.extract_info, media.url)
                 )
+                path = info["requested_downloads"][0]["filepath"]
             except Exception as e:
-                logger.error(f"YoutubeDL error load video error: {e}")
-        video = await Video.filter(id=video.id).first()
+                logger.error(f"YoutubeDL error load {stream} error: {e}")
+                return None
+            finally:
+                progress_reporter.forget(media.id)
+        await storage.upload(f"{media.id}/{stream}/{os.path.basename(path)}")
+        return path
 
-        logger.info(f"Extract audio start: {video.id} {video.url}")
-        audios = await self.split_audio(
-            f"downloads/{video.id}/video/{video.id}.mp4",
-            f"downloads/{video.id}/audio/",
-        )
-        video.audio_chunks = len(audios)
-        video.status = "transcribe"
-        await video.save()
-
-        logger.info(f"Transcribe audio start: {video.id} {video.url}")
-        logger.info(f"Audios: {audios}")
-        transcribe = Transcriber()
-        text = await transcribe.transcribe(audios)
-        video.text = text
-        await video.save()
-
-        logger.info(f"Summarize text start: {video.id} {video.url}")
-        video.status = "summarize"
-        await video.save()
+    async def get_audio_stream(self, media: Media) -> Tuple[str, Dict[str, str]]:
+        """
+        Resolve the direct URL of the audio stream of a video, or of a live stream.
+
+        :param media: (Media) item of db model
+        :return: (Tuple[str, Dict[str, str]]) stream URL and the HTTP headers
+            required to read it
+        """
+
+        options = {"quiet": True, "format": self.formats["audio"]}
+        with YoutubeDL(options) as ydl:
+            info = await asyncio.to_thread(ydl.extract_info, media.url, download=False)
+        return info["url"], info.get("http_headers", {})
+
+    async def fetch_video(self, media: Media) -> None:
+        """
+        Download the video stream of a video whose audio was downloaded first.
+
+        :param media: (Media) item of db model
+        :return: None
+        """
+
+        if not await storage.exists(f"{media.id}/video/{media.id}.mp4"):
+            async with job_queue.stage("download"):
+                path = await self.download_media(media, "video", progress=False)
+            if path is None:
+                logger.error(f"Video fetch error: {media.id} {media.url}")
+                return
+        if media.download_policy == "audio_only":
+            await Media.filter(id=media.id).update(download_policy="audio_first")
+        logger.info(f"Video fetched: {media.id} {media.url}")
+        await self.remux_hls(media)
+
+    def start_fetch_video(self, media: Media) -> asyncio.Task:
+        """
+        Start fetching the video stream of a media in the background, or get
+        the fetch already running, so the same video is not downloaded twice.
+
+        :param media: (Media) item of db model
+        :return: (asyncio.Task) the running fetch
+        """
+
+        id = str(media.id)
+        if id not in video_fetches:
+            task = job_queue.create_task(self.fetch_video(media))
+            task.add_done_callback(lambda _: video_fetches.pop(id, None))
+            video_fetches[id] = task
+        return video_fetches[id]
+
+    async def refetch(self, media: Media) -> None:
+        """
+        Download again the files of a media deleted by the disk collector:
+        the video, or the audio stream of `audio_only` media.
+        The media is marked evicted again if the download fails.
+
+        :param media: (Media) item of db model
+        :return: None
+        """
+
+        logger.info(f"Refetch start: {media.id} {media.url}")
+        if media.download_policy == "audio_only":
+            async with job_queue.stage("download"):
+                path = await self.download_media(media, "audio", progress=False)
+        else:
+            await asyncio.shield(self.start_fetch_video(media))
+            path = await storage.fetch(f"{media.id}/video/{media.id}.mp4")
+        if path is None:
+            await Media.filter(id=media.id).update(evicted=True)
+
+    @staticmethod
+    async def remux_hls(media: Media) -> None:
+        """
+        Remux the downloaded video to HLS, if enabled, so playback can start
+        after the first segment. The MP4 is still served if remuxing fails.
+
+        :param media: (Media) item of db model
+        :return: None
+        """
+
+        if not HLS_ENABLED or await storage.exists(f"{media.id}/hls/{MASTER_PLAYLIST}"):
+            return
+        async with job_queue.stage("remux"):
+            logger.info(f"Remux HLS start: {media.id} {media.url}")
+            try:
+                video_path = await storage.fetch(f"{media.id}/video/{media.id}.mp4")
+                if video_path is None:
+                    raise FileNotFoundError("video is not downloaded")
+                renditions = await asyncio.to_thread(
+                    build_hls,
+                    video_path,
+                    storage.local_path(f"{media.id}/hls"),
+                    HLS_SEGMENT_SECONDS,
+                    HLS_LOW_HEIGHT,
+                )
+                await storage.upload_dir(f"{media.id}/hls")
+                logger.info(f"Remux HLS done: {media.id} {renditions}")
+            except Exception as e:
+                logger.error(f"Remux HLS error {media.id}: {e}")
+
+    @staticmethod
+    def is_finished(media: Media, stage: str) -> bool:
+        """
+        Check if a pipeline stage of a media was finished by a previous run.
+
+        :param media: (Media) item of db model
+        :param stage: (str) stage name from `PIPELINE_STAGES`
+        :return: (bool)
+        """
+
+        if media.checkpoint not in PIPELINE_STAGES:
+            return False
+        return PIPELINE_STAGES.index(media.checkpoint) >= PIPELINE_STAGES.index(stage)
+
+    @classmethod
+    async def save_checkpoint(cls, media: Media, stage: str) -> None:
+        """
+        Record durably that a pipeline stage of a media is finished,
+        so a retry or restart skips it. A later stage already finished,
+        e.g. by the streaming transcription, is kept.
+
+        :param media: (Media) item of db model
+        :param stage: (str) stage name from `PIPELINE_STAGES`
+        :return: None
+        """
+
+        if cls.is_finished(media, stage):
+            return
+        media.checkpoint = stage
+        await Media.filter(id=media.id).update(checkpoint=stage)
+
+    @staticmethod
+    async def find_source(media: Media) -> Optional[str]:
+        """
+        Get the downloaded file the audio of a media is extracted from:
+        the video, or the audio stream with the `audio_first` and `audio_only`
+        download policies.
+
+        :param media: (Media) item of db model
+        :return: (Optional[str]) local path, None if it is not downloaded
+        """
+
+        if media.download_policy == "full":
+            return await storage.fetch(f"{media.id}/video/{media.id}.mp4")
+        keys = await storage.list(f"{media.id}/audio")
+        for key in keys:
+            if PurePosixPath(key).stem == str(media.id):
+                return await storage.fetch(key)
+        return None
+
+    @staticmethod
+    async def transcribe_progress(media: Media, done: int, total: int) -> None:
+        """
+        Save transcription progress of a video, e.g. "transcribe 7/18".
+
+        :param media: (Media) item of db model
+        :param done: (int) number of transcribed audio chunks
+        :param total: (int) total number of audio chunks
+        :return: None
+        """
+
+        media.status = f"transcribe {done}/{total}"
+        await Media.filter(id=media.id).update(status=media.status, audio_chunks=total)
+        await video_events.publish(media.id, status=media.status)
+
+    async def download_source(self, media: Media) -> str:
+        """
+        Download the thumbnail and the file the audio of a media is extracted from,
+        unless a previous run did.
+
+        :param media: (Media) item of db model
+        :return: (str) local path of the downloaded file
+        """
+
+        if self.is_finished(media, "download"):
+            source_path = await self.find_source(media)
+            if source_path is not None:
+                return source_path
+        async with job_queue.stage("download"):
+            await self.download_thumbnail(media)
+            if media.download_policy == "full":
+                await self.download_media(media, "video")
+                source_path = await self.find_source(media)
+            else:
+                source_path = await self.download_media(media, "audio")
+        if source_path is None:
+            raise FileNotFoundError(f"Media is not downloaded: {media.url}")
+        await self.save_checkpoint(media, "download")
+        return source_path
+
+    async def stream_transcribe(self, media: Media) -> None:
+        """
+        Transcribe and summarize a video while it is being downloaded.
+
+        The audio stream is decoded by ffmpeg straight from its URL, so this works
+        for live streams too, and every chunk of `self.chunk_duration` seconds
+        is transcribed as soon as it is decoded, then summarized as soon as it
+        is transcribed. Partial summaries are saved to the description as they
+        come in. The chunks have the same boundaries as in the staged pipeline,
+        so chunks transcribed before a failure are reused by either one.
+
+        :param media: (Media) item of db model
+        :return: None
+        """
+
+        url, headers = await self.get_audio_stream(media)
+        audio_dir = storage.local_path(f"{media.id}/audio/")
+        os.makedirs(audio_dir, exist_ok=True)
+        done_chunks = await get_chunks(media.id)
+        transcriber = await registry.get_transcriber()
+        summarizer = await registry.get_summarizer()
+        tasks: List[asyncio.Task] = []
+        summaries: Dict[int, str] = {}
+        speech: List[SpeechChunk] = []
+        done = len(done_chunks)
+        summarized = True  # every summary succeeded
+
+        async def process_chunk(i: int, chunk: PcmChunk) -> List[dict]:
+            nonlocal done, summarized
+            if self.vad:
+                chunk = await asyncio.to_thread(find_speech, chunk)
+                speech.append(chunk)
+            segments = done_chunks.get(i)
+            if segments is None:
+                offset = i * self.chunk_duration
+                segments = await transcriber.transcribe_chunk(chunk, offset)
+                await save_chunk(media, i, segments)
+                done += 1
+                await self.transcribe_progress(media, done, len(tasks))
+            async with job_queue.stage("summarize"):
+                try:
+                    text = "".join(segment["text"] for segment in segments)
+                    summaries[i] = await summarizer.get_summary(text)
+                except Exception as e:
+                    summarized = False
+                    logger.error(f"Summarizer error: {e}")
+            description = " ".join(summaries[j] for j in sorted(summaries))
+            await Media.filter(id=media.id).update(description=description)
+            return segments
+
+        logger.info(f"Stream transcribe start: {media.id} {media.url}")
+        process = None
         try:
-            summary = Summarizer()
-            await summary.load_model()
-            description = await summary.get_summary(text)
-            video.description = description
-        except Exception as e:
-            logger.error(f"Summarizer error: {e}")
-        video.status = "done"
-        await video.save()
-        logger.info(f"Done: {video.id} {video.url}")
+            async with job_queue.stage("transcribe"):
+                # decoding starts with a free slot, so the stream doesn't stall
+                process = decode_stream(url, headers)
+                chunks = stream_pcm(
+                    process, f"{audio_dir}stream.f32", self.chunk_duration
+                )
+                async for chunk in iterate_in_threadpool(chunks):
+                    tasks.append(asyncio.create_task(process_chunk(len(tasks), chunk)))
+                results = await asyncio.gather(*tasks)
+        finally:
+            if process is not None and process.poll() is None:
+                process.kill()
+            for task in tasks:
+                task.cancel()
+
+        await save_transcript(media, [s for segments in results for s in segments])
+        await Media.filter(id=media.id).update(audio_chunks=len(tasks))
+        if self.vad:
+            await self.save_speech_stats(media, speech)
+        await self.save_checkpoint(media, "transcribe")
+        description = " ".join(summaries[i] for i in sorted(summaries))
+        if SUMMARIZE_MODE == "hierarchical" and len(summaries) > 1:
+            async with job_queue.stage("summarize"):
+                try:
+                    description = await summarizer.get_summary(description)
+                except Exception as e:
+                    summarized = False
+                    logger.error(f"Summarizer error: {e}")
+        await Media.filter(id=media.id).update(description=description)
+        if summarized:
+            await self.save_checkpoint(media, "summarize")
+        logger.info(f"Stream transcribe done: {media.id} {len(tasks)} chunks")
+
+    async def download_video_with_async_hook(self, media: Media) -> None:
+        """
+        Download a video and its thumbnail, extract audio, transcribe, and summarize content.
+        Results are stored once, in the media shared by all users of the video.
+
+        This function handles the entire video processing pipeline, which includes:
+        - Downloading the video and its thumbnail using `YoutubeDL`.
+          With the `audio_first` and `audio_only` download policies only the audio
+          stream is downloaded before transcription, and the video is fetched
+          in the background or on demand; the media is done without waiting for it.
+        - Remuxing the downloaded video to HLS in the background, if enabled.
+        - Extracting audio from the downloaded media and splitting it into chunks.
+        - Reducing decoded chunks to their speech windows, if the voice activity
+          detector is enabled.
+        - Transcribing the audio into timestamped segments.
+        - Summarizing the transcribed text into a concise description.
+
+        Finished stages are recorded in `media.checkpoint` and each transcribed
+        audio chunk is saved as soon as it is done, so a retried or resumed job
+        reuses the download, the audio chunks and the transcribed chunks,
+        and only redoes what is missing.
+
+        In the `streaming` pipeline mode the audio is transcribed and summarized
+        by `stream_transcribe` while the download is running, and the staged
+        extraction and transcription only run if streaming fails.
+
+        :param media: (Media) item of db model
+        :return: None
+        """
+
+        policy = media.download_policy
+        stream_task = None
+        if self.pipeline_mode == "streaming" and not self.is_finished(
+            media, "transcribe"
+        ):
+            stream_task = job_queue.create_task(self.stream_transcribe(media))
+        try:
+            source_path = await self.download_source(media)
+        except BaseException:
+            if stream_task is not None:
+                stream_task.cancel()
+            raise
+        if policy == "full":
+            job_queue.create_task(self.remux_hls(media))
+        elif policy == "audio_first":
+            self.start_fetch_video(media)
+        if stream_task is not None:
+            try:
+                await stream_task
+            except Exception as e:
+                logger.error(f"Stream transcribe error {media.id}: {e}")
+        media = await Media.filter(id=media.id).first()
+
+        if self.is_finished(media, "transcribe"):
+            segments = await get_segments(media.id)
+        else:
+            async with job_queue.stage("extract"):
+                logger.info(f"Extract audio start: {media.id} {media.url}")
+                extract = (
+                    self.extract_pcm if self.audio_mode == "pcm" else self.split_audio
+                )
+                audios = await extract(
+                    source_path, storage.local_path(f"{media.id}/audio/")
+                )
+                if self.vad and self.audio_mode == "pcm":
+                    audios = await self.detect_speech(media, audios)
+            if self.audio_mode != "pcm":
+                await asyncio.gather(
+                    *(
+                        storage.upload(f"{media.id}/audio/{os.path.basename(path)}")
+                        for path in audios
+                    )
+                )
+            await self.save_checkpoint(media, "extract")
+            done_chunks = await get_chunks(media.id)
+            media.audio_chunks = len(audios)
+            media.status = f"transcribe {len(done_chunks)}/{len(audios)}"
+            await media.save(update_fields=["audio_chunks", "status"])
+
+            async with job_queue.stage("transcribe"):
+                logger.info(f"Transcribe audio start: {media.id} {media.url}")
+                logger.info(f"Audios: {audios}, done: {sorted(done_chunks)}")
+                transcriber = await registry.get_transcriber()
+                segments = await transcriber.transcribe(
+                    audios,
+                    progress=functools.partial(self.transcribe_progress, media),
+                    chunk_duration=self.chunk_duration,
+                    done_chunks=done_chunks,
+                    on_chunk=functools.partial(save_chunk, media),
+                )
+            await save_transcript(media, segments)
+            await self.save_checkpoint(media, "transcribe")
+        await self.remove_pcm(media)
+        text = "".join(segment["text"] for segment in segments)
+
+        if not self.is_finished(media, "summarize"):
+            logger.info(f"Summarize text start: {media.id} {media.url}")
+            media.status = "summarize"
+            await media.save(update_fields=["status"])
+            async with job_queue.stage("summarize"):
+                try:
+                    summarizer = await registry.get_summarizer()
+                    description = await summarizer.get_summary(text)
+                    media.description = description
+                    media.checkpoint = "summarize"
+                except Exception as e:
+                    logger.error(f"Summarizer error: {e}")
+        media.status = "done"
+        await media.save(update_fields=["description", "status", "checkpoint"])
+        logger.info(f"Done: {media.id} {media.url}")
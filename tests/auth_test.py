@@ -0,0 +1,45 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from contextly.utils.auth import HashingPool, SessionCache
+
+
+def test_session_cache():
+    cache = SessionCache(maxsize=2, ttl=60)
+    first, second = SimpleNamespace(id=1), SimpleNamespace(id=2)
+    assert cache.get("a") is None
+    cache.set("a", first)
+    cache.set("b", second)
+    assert cache.get("a") is first
+    cache.set("c", second)
+    assert cache.get("b") is None
+    assert cache.get("c") is second
+    cache.invalidate(user_id=2)
+    assert cache.get("c") is None
+    cache.set("d", first, exp=time.time() - 1)
+    assert cache.get("d") is None
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+@pytest.mark.anyio
+async def test_hashing_pool():
+    pool = HashingPool(workers=1, queue_size=0, timeout=0.05)
+    hashed = await pool.hash("secret")
+    assert await pool.verify("secret", hashed)
+    assert not await pool.verify("other", hashed)
+    thread = await pool.run(threading.current_thread)
+    assert thread.name.startswith("hashing")
+
+    release = threading.Event()
+    busy = asyncio.create_task(pool.run(release.wait))
+    await asyncio.sleep(0.01)
+    with pytest.raises(HTTPException) as error:  # the only slot is taken
+        await pool.run(threading.current_thread)
+    assert error.value.status_code == 503
+    release.set()
+    await busy
@@ -0,0 +1,23 @@
+from contextly.db import get_connection
+from contextly.settings import DB_POOL_MIN_SIZE, DB_STATEMENT_CACHE_SIZE
+
+
+def test_sqlite_connection():
+    credentials = get_connection("sqlite://db.sqlite3")["credentials"]
+    assert credentials["journal_mode"] == "WAL"
+    assert credentials["synchronous"] == "NORMAL"
+    credentials = get_connection("sqlite://db.sqlite3?journal_mode=DELETE")[
+        "credentials"
+    ]
+    assert credentials["journal_mode"] == "DELETE"  # the url takes precedence
+
+
+def test_postgres_connection():
+    connection = get_connection("postgres://user:secret@db:5432/contextly?maxsize=3")
+    assert connection["engine"] == "tortoise.backends.asyncpg"
+    credentials = connection["credentials"]
+    assert (credentials["host"], credentials["database"]) == ("db", "contextly")
+    assert credentials["minsize"] == DB_POOL_MIN_SIZE
+    assert credentials["maxsize"] == "3"  # the url takes precedence
+    assert credentials["statement_cache_size"] == DB_STATEMENT_CACHE_SIZE
+    assert "journal_mode" not in credentials
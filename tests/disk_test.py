@@ -0,0 +1,58 @@
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+from tortoise import timezone
+
+from contextly.models.media import Media
+from contextly.utils.disk import DiskCollector
+
+
+def write(path: Path, size: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\0" * size)
+
+
+@pytest.mark.anyio
+async def test_disk_collector(client: AsyncClient, tmp_path):
+    now = timezone.now()
+    old = await Media.create(
+        source_id="disk-old", url="old", status="done", viewed_at=now - timedelta(1)
+    )
+    new = await Media.create(source_id="disk-new", url="new", status="done")
+    await Media.filter(id=new.id).update(viewed_at=now)
+    running = await Media.create(source_id="disk-run", url="run", status="summarize")
+    for media in [old, new, running]:
+        root = tmp_path / str(media.id)
+        write(root / f"img/{media.id}.webp", 10)
+        write(root / "audio/0.mp3", 100)
+        write(root / "audio/1.mp3", 100)
+        write(root / f"video/{media.id}.mp4", 1000)
+
+    collector = DiskCollector(str(tmp_path), budget=3600, interval=0, target=0.9)
+    assert await collector.collect() == 400  # chunks of done media first
+    assert not (tmp_path / f"{old.id}/audio/0.mp3").exists()
+    assert (tmp_path / f"{running.id}/audio/0.mp3").exists()
+
+    collector.budget = 2500
+    assert await collector.collect() == 1000  # then the least recently viewed video
+    assert not (tmp_path / f"{old.id}/video/{old.id}.mp4").exists()
+    assert (tmp_path / f"{new.id}/video/{new.id}.mp4").exists()
+    assert (tmp_path / f"{old.id}/img/{old.id}.webp").exists()
+    assert (await Media.get(id=old.id)).evicted
+    assert not (await Media.get(id=new.id)).evicted
+    assert await collector.collect() == 0
+
+
+@pytest.mark.anyio
+async def test_disk_collector_skips_thumbnail_cache(client: AsyncClient, tmp_path):
+    media = await Media.create(source_id="disk-cache", url="cache", status="done")
+    write(tmp_path / f"{media.id}/video/{media.id}.mp4", 1000)
+    write(tmp_path / "thumbnails/ab/cached.webp", 5000)
+
+    collector = DiskCollector(
+        str(tmp_path), budget=2000, interval=0, exclude=[str(tmp_path / "thumbnails")]
+    )
+    assert await collector.collect() == 0  # the cache has a budget of its own
+    assert (tmp_path / f"{media.id}/video/{media.id}.mp4").exists()
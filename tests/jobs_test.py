@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from contextly.models.media import Media
+from contextly.utils.jobs import JobQueue
+
+
+@pytest.mark.anyio
+async def test_stage_limit():
+    queue = JobQueue({"transcribe": 1})
+    running, peak = 0, 0
+
+    async def job():
+        nonlocal running, peak
+        async with queue.stage("transcribe"):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(job(), job())
+    assert peak == 1
+
+
+@pytest.mark.anyio
+async def test_resume(client: AsyncClient):
+    unfinished = await Media.create(
+        source_id="resume-job", url="unfinished", status="transcribe 1/2"
+    )
+    failing = await Media.create(source_id="resume-fail", url="fail", status="create")
+    done = await Media.create(source_id="resume-done", url="done", status="done")
+    resumed = []
+
+    async def runner(media):
+        resumed.append(media.id)
+        if media.id == failing.id:
+            raise RuntimeError("download failed")
+
+    queue = JobQueue({})
+    await queue.resume(runner)
+    await asyncio.gather(*queue.tasks)
+    assert unfinished.id in resumed and failing.id in resumed
+    assert done.id not in resumed
+    assert (await Media.get(id=failing.id)).status == "error"
@@ -0,0 +1,26 @@
+from contextly.utils.media import get_source_id
+
+CANONICAL = ("youtube:dQw4w9WgXcQ", "https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+
+
+def test_youtube_urls():
+    for url in [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://youtube.com/watch?v=dQw4w9WgXcQ&t=30s",
+        "https://www.youtube.com/watch?list=PL123&v=dQw4w9WgXcQ&index=2",
+        "https://m.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://music.youtube.com/watch?v=dQw4w9WgXcQ&feature=share",
+        "https://youtu.be/dQw4w9WgXcQ?t=30",
+        "youtu.be/dQw4w9WgXcQ",
+        "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+        "https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ?start=10",
+        " https://www.youtube.com/live/dQw4w9WgXcQ ",
+    ]:
+        assert get_source_id(url) == CANONICAL, url
+
+
+def test_other_urls():
+    url = "https://vimeo.com/123456"
+    assert get_source_id(url) == (url, url)
+    url = "https://www.youtube.com/watch?v=short"
+    assert get_source_id(url) == (url, url)
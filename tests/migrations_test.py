@@ -0,0 +1,110 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+from tortoise.backends.sqlite import SqliteClient
+
+import contextly
+
+MIGRATIONS = Path(contextly.__file__).parent / "migrations" / "models"
+
+
+async def migrate(db: SqliteClient, version: int) -> None:
+    """
+    Apply the migration of a version.
+    """
+
+    path = next(MIGRATIONS.glob(f"{version}_*.py"))
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    await db.execute_script(await module.upgrade(db))
+
+
+@pytest.mark.anyio
+async def test_shared_media_migration(tmp_path):
+    db = SqliteClient(str(tmp_path / "db.sqlite3"), connection_name="migrations")
+    await db.create_connection(with_db=True)
+    try:
+        for version in range(4):
+            await migrate(db, version)
+        await db.execute_script("""
+            INSERT INTO "users" ("id", "username", "hashed_password", "email")
+                VALUES (1, 'a', '', 'a@test.ru'), (2, 'b', '', 'b@test.ru');
+            INSERT INTO "videos" ("id", "url", "description", "text", "status",
+                "user_id", "created_at") VALUES
+                ('v1', 'https://youtu.be/dQw4w9WgXcQ', '', '', 'error', 1, '2026-01-01'),
+                ('v2', 'youtube.com/watch?v=dQw4w9WgXcQ&t=30', '', '', 'done', 2,
+                    '2026-01-02'),
+                ('v3', 'https://www.youtube.com/shorts/dQw4w9WgXcQ', '', '', 'done', 2,
+                    '2026-01-03'),
+                ('v4', 'https://example.com/talk.mp4', '', '', 'done', 1,
+                    '2026-01-04');
+            INSERT INTO "transcript_blocks" ("index", "start", "end", "segments",
+                "data", "video_id") VALUES (0, 0, 1, 1, '', 'v1'), (0, 0, 1, 1, '', 'v2');
+            """)
+        await migrate(db, 4)
+
+        media = await db.execute_query_dict(
+            'SELECT "id", "source_id", "url", "refs" FROM "media" ORDER BY "id"'
+        )
+        assert media == [
+            {
+                "id": "v2",  # the done media is kept
+                "source_id": "youtube:dQw4w9WgXcQ",
+                "url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+                "refs": 2,
+            },
+            {
+                "id": "v4",
+                "source_id": "https://example.com/talk.mp4",
+                "url": "https://example.com/talk.mp4",
+                "refs": 1,
+            },
+        ]
+        videos = await db.execute_query_dict(
+            'SELECT "id", "media_id", "user_id" FROM "videos" ORDER BY "id"'
+        )
+        # the second url of user 2 is dropped, the one of user 1 is merged
+        assert [tuple(video.values()) for video in videos] == [
+            ("v1", "v2", 1),
+            ("v2", "v2", 2),
+            ("v4", "v4", 1),
+        ]
+        blocks = await db.execute_query_dict(
+            'SELECT "media_id" FROM "transcript_blocks"'
+        )
+        assert blocks == [{"media_id": "v2"}]
+    finally:
+        await db.close()
+
+
+@pytest.mark.anyio
+async def test_legacy_transcripts_migration(tmp_path):
+    db = SqliteClient(str(tmp_path / "db.sqlite3"), connection_name="migrations")
+    await db.create_connection(with_db=True)
+    try:
+        for version in range(8):
+            await migrate(db, version)
+        await db.execute_script("""
+            INSERT INTO "media" ("id", "source_id", "url", "description", "text")
+                VALUES ('legacy', 'legacy', 'legacy', '', 'Привет, it''s old'),
+                ('blocks', 'blocks', 'blocks', '', 'already moved'),
+                ('empty', 'empty', 'empty', '', '');
+            INSERT INTO "transcript_blocks" ("index", "start", "end", "segments",
+                "data", "media_id") VALUES (0, 0, 1, 1, '[]', 'blocks');
+            """)
+        await migrate(db, 8)
+
+        blocks = await db.execute_query_dict(
+            'SELECT "media_id", "data" FROM "transcript_blocks" ORDER BY "media_id"'
+        )
+        assert [block["media_id"] for block in blocks] == ["blocks", "legacy"]
+        assert json.loads(blocks[1]["data"]) == [
+            {"start": 0.0, "end": 0.0, "text": "Привет, it's old"}
+        ]
+        columns = await db.execute_query_dict('PRAGMA table_info("media")')
+        assert "text" not in [column["name"] for column in columns]
+    finally:
+        await db.close()
@@ -0,0 +1,292 @@
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+from httpx import AsyncClient
+
+from contextly.models.media import Media
+from contextly.utils import youtubedl
+from contextly.utils.audio import PcmChunk
+from contextly.utils.jobs import job_queue
+from contextly.utils.registry import registry
+from contextly.utils.storage import storage
+from contextly.utils.transcriber import Transcriber
+from contextly.utils.transcripts import (get_chunks, get_segments, save_chunk,
+                                         save_transcript)
+from contextly.utils.youtubedl import YouTubeDl
+
+FIRST = [{"start": 0.0, "end": 1.0, "text": " first"}]
+SECOND = [{"start": 600.0, "end": 601.0, "text": " second"}]
+
+
+@pytest.mark.anyio
+async def test_transcriber_skips_done_chunks():
+    transcriber = Transcriber.__new__(Transcriber)
+    transcriber.slots = asyncio.Semaphore(1)
+    transcriber._transcribe_chunk = lambda path, offset: [
+        {"start": offset, "end": offset + 1.0, "text": f" {path}"}
+    ]
+    saved = {}
+
+    async def on_chunk(i, segments):
+        saved[i] = segments
+
+    segments = await transcriber.transcribe(
+        ["0.mp3", "1.mp3"], done_chunks={0: FIRST}, on_chunk=on_chunk
+    )
+    assert segments == FIRST + [{"start": 600, "end": 601.0, "text": " 1.mp3"}]
+    assert list(saved) == [1]
+
+
+@pytest.mark.anyio
+async def test_transcriber_concurrent_chunks():
+    transcriber = Transcriber.__new__(Transcriber)
+    transcriber.slots = asyncio.Semaphore(2)
+    lock, running, peak = threading.Lock(), 0, 0
+
+    def transcribe_chunk(path, offset):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.03 if path == "0.mp3" else 0.01)  # the first chunk ends last
+        with lock:
+            running -= 1
+        return [{"start": offset, "end": offset + 1.0, "text": f" {path}"}]
+
+    transcriber._transcribe_chunk = transcribe_chunk
+    progress = []
+
+    async def on_progress(done, total):
+        progress.append((done, total))
+
+    segments = await transcriber.transcribe(
+        ["0.mp3", "1.mp3", "2.mp3"], progress=on_progress, chunk_duration=10
+    )
+    assert [segment["start"] for segment in segments] == [0, 10, 20]
+    assert peak == 2
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+
+
+@pytest.mark.anyio
+async def test_pipeline_resume(client: AsyncClient, tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "root", str(tmp_path))
+    media = await Media.create(
+        source_id="resume",
+        url="https://example.com/resume",
+        status="transcribe 1/2",
+        checkpoint="extract",
+        download_policy="audio_only",
+    )
+    audio_path = tmp_path / f"{media.id}/audio/{media.id}.m4a"
+    audio_path.parent.mkdir(parents=True)
+    audio_path.write_bytes(b"audio")
+    await save_chunk(media, 0, FIRST)
+
+    async def download_media(self, media, stream, progress=True):
+        raise AssertionError("finished download is repeated")
+
+    async def split_audio(self, video_path, output_path):
+        assert video_path == str(audio_path)
+        return [f"{output_path}0.mp3", f"{output_path}1.mp3"]
+
+    class FakeTranscriber:
+        async def transcribe(
+            self, audios, progress, chunk_duration, done_chunks, on_chunk
+        ):
+            assert list(done_chunks) == [0]
+            await on_chunk(1, SECOND)
+            assert await get_chunks(media.id) == {0: FIRST, 1: SECOND}
+            await progress(2, 2)
+            return done_chunks[0] + SECOND
+
+    class FakeSummarizer:
+        async def get_summary(self, text):
+            return text.strip()
+
+    async def get_transcriber():
+        return FakeTranscriber()
+
+    async def get_summarizer():
+        return FakeSummarizer()
+
+    monkeypatch.setattr(YouTubeDl, "download_media", download_media)
+    monkeypatch.setattr(YouTubeDl, "split_audio", split_audio)
+    monkeypatch.setattr(registry, "get_transcriber", get_transcriber)
+    monkeypatch.setattr(registry, "get_summarizer", get_summarizer)
+    await YouTubeDl().download_video_with_async_hook(media)
+
+    media = await Media.get(id=media.id)
+    assert (media.status, media.checkpoint) == ("done", "summarize")
+    assert media.description == "first second"
+    assert await get_segments(media.id) == FIRST + SECOND
+    assert await get_chunks(media.id) == {}
+
+
+@pytest.mark.anyio
+async def test_streaming_pipeline(client: AsyncClient, tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "root", str(tmp_path))
+    media = await Media.create(
+        source_id="stream",
+        url="https://example.com/stream",
+        status="queued",
+        download_policy="audio_only",
+    )
+    transcribed = asyncio.Event()
+
+    async def get_audio_stream(self, media):
+        return "https://example.com/stream.m4a", {}
+
+    class FakeProcess:
+        def poll(self):
+            return 0
+
+    decoding = []
+
+    def decode_stream(url, headers):
+        decoding.append(job_queue.stage("transcribe").locked())
+        return FakeProcess()
+
+    def stream_pcm(process, output_path, chunk_duration):
+        with open(output_path, "wb") as output:
+            output.write(b"\0" * 16)
+        yield PcmChunk(output_path, 0, 2)
+        yield PcmChunk(output_path, 2, 2)
+
+    async def download_media(self, media, stream, progress=True):
+        await asyncio.wait_for(transcribed.wait(), 5)  # overlaps the transcription
+        path = tmp_path / f"{media.id}/audio/{media.id}.m4a"
+        path.write_bytes(b"audio")
+        return str(path)
+
+    class FakeTranscriber:
+        async def transcribe_chunk(self, audio, offset):
+            transcribed.set()
+            return FIRST if offset == 0 else SECOND
+
+    class FakeSummarizer:
+        async def get_summary(self, text):
+            return text.strip()
+
+    async def get_transcriber():
+        return FakeTranscriber()
+
+    async def get_summarizer():
+        return FakeSummarizer()
+
+    monkeypatch.setattr(YouTubeDl, "get_audio_stream", get_audio_stream)
+    monkeypatch.setattr(YouTubeDl, "download_media", download_media)
+    monkeypatch.setattr(YouTubeDl, "download_thumbnail", AsyncMock())
+    monkeypatch.setattr(youtubedl, "decode_stream", decode_stream)
+    monkeypatch.setattr(youtubedl, "stream_pcm", stream_pcm)
+    monkeypatch.setattr(registry, "get_transcriber", get_transcriber)
+    monkeypatch.setattr(registry, "get_summarizer", get_summarizer)
+    await YouTubeDl(pipeline_mode="streaming").download_video_with_async_hook(media)
+
+    media = await Media.get(id=media.id)
+    assert (media.status, media.checkpoint) == ("done", "summarize")
+    assert media.description == "first second"
+    assert media.audio_chunks == 2
+    assert await get_segments(media.id) == FIRST + SECOND
+    assert not (tmp_path / f"{media.id}/audio/stream.f32").exists()
+    assert decoding == [True]  # ffmpeg starts with the transcribe slot
+
+
+@pytest.mark.anyio
+async def test_audio_first_done_before_video(
+    client: AsyncClient, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(storage, "root", str(tmp_path))
+    media = await Media.create(
+        source_id="audio-first",
+        url="https://example.com/audio-first",
+        status="transcribe 2/2",
+        checkpoint="transcribe",
+        download_policy="audio_first",
+    )
+    audio_path = tmp_path / f"{media.id}/audio/{media.id}.m4a"
+    audio_path.parent.mkdir(parents=True)
+    audio_path.write_bytes(b"audio")
+    await save_transcript(media, FIRST + SECOND)
+    fetching = asyncio.Event()
+
+    async def fetch_video(self, media):
+        fetching.set()
+        await asyncio.Event().wait()  # the video stream is still downloading
+
+    class FakeSummarizer:
+        async def get_summary(self, text):
+            return text.strip()
+
+    async def get_summarizer():
+        return FakeSummarizer()
+
+    monkeypatch.setattr(YouTubeDl, "fetch_video", fetch_video)
+    monkeypatch.setattr(registry, "get_summarizer", get_summarizer)
+    await asyncio.wait_for(YouTubeDl().download_video_with_async_hook(media), 5)
+
+    media = await Media.get(id=media.id)
+    assert (media.status, media.description) == ("done", "first second")
+    assert fetching.is_set()
+    for task in job_queue.tasks:
+        task.cancel()
+
+
+@pytest.mark.anyio
+async def test_fetch_video_once(client: AsyncClient, tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "root", str(tmp_path))
+    media = await Media.create(
+        source_id="fetch-video",
+        url="https://example.com/fetch-video",
+        status="done",
+        download_policy="audio_only",
+    )
+    downloads = []
+
+    async def download_media(self, media, stream, progress=True):
+        downloads.append(stream)
+        await asyncio.sleep(0.01)
+        return None  # yt-dlp failed
+
+    monkeypatch.setattr(YouTubeDl, "download_media", download_media)
+    ytdl = YouTubeDl()
+    task = ytdl.start_fetch_video(media)
+    assert ytdl.start_fetch_video(media) is task  # a second click joins the fetch
+    await task
+    assert downloads == ["video"]
+    media = await Media.get(id=media.id)
+    assert media.download_policy == "audio_only"  # the video can be fetched again
+
+
+@pytest.mark.anyio
+async def test_failed_summary_not_checkpointed(
+    client: AsyncClient, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(storage, "root", str(tmp_path))
+    media = await Media.create(
+        source_id="summary-error",
+        url="https://example.com/summary-error",
+        status="summarize",
+        checkpoint="transcribe",
+        download_policy="audio_only",
+    )
+    audio_path = tmp_path / f"{media.id}/audio/{media.id}.m4a"
+    audio_path.parent.mkdir(parents=True)
+    audio_path.write_bytes(b"audio")
+    await save_transcript(media, FIRST + SECOND)
+
+    class FailingSummarizer:
+        async def get_summary(self, text):
+            raise RuntimeError("out of memory")
+
+    async def get_summarizer():
+        return FailingSummarizer()
+
+    monkeypatch.setattr(registry, "get_summarizer", get_summarizer)
+    await YouTubeDl().download_video_with_async_hook(media)
+
+    media = await Media.get(id=media.id)
+    assert media.status == "done"
+    assert media.checkpoint == "transcribe"  # a retry summarizes again
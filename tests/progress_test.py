@@ -0,0 +1,29 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from contextly.utils.progress import ProgressReporter
+
+
+@pytest.mark.anyio
+async def test_progress_throttling(monkeypatch):
+    written = []
+
+    async def write(media, fields):
+        written.append(fields)
+
+    monkeypatch.setattr(ProgressReporter, "write", staticmethod(write))
+    reporter = ProgressReporter(interval=60, threshold=5)
+    loop = asyncio.get_running_loop()
+    media = SimpleNamespace(id=uuid.uuid4())
+    for percent in [0, 1, 2, 6, 7]:
+        reporter.report(loop, media, percent, status=f"downloading-{percent}%")
+    reporter.report(loop, media, status="finished", title="title")
+    await asyncio.sleep(0.1)
+    assert written == [
+        {"status": "downloading-0%"},
+        {"status": "downloading-6%"},
+        {"status": "finished", "title": "title"},
+    ]
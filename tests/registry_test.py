@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+import torch
+
+from contextly.utils.inference import ProcessModel
+from contextly.utils.registry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self):
+        self.model = torch.nn.Linear(4, 4)
+
+
+@pytest.mark.anyio
+async def test_registry_loads_once():
+    loads = []
+
+    def load_fake():
+        loads.append(1)
+        return FakeModel()
+
+    registry = ModelRegistry("thread")
+    registry.loaders = {"fake": load_fake}
+    first, second = await asyncio.gather(registry.get("fake"), registry.get("fake"))
+    assert first is second
+    assert len(loads) == 1
+    await registry.load_all()
+    assert len(loads) == 1
+    assert registry.stats["fake"]["weights_mb"] == round(20 * 4 / 2**20, 1)
+    assert registry.stats["fake"]["load_time"] >= 0
+
+
+@pytest.mark.anyio
+async def test_process_workers_warm_up():
+    registry = ModelRegistry("process")
+    registry.process_models = {"fake": (ProcessModel, dict, 2)}
+    model = await registry.get("fake")
+    try:
+        stats = registry.stats["fake"]["workers"]
+        assert len({worker["pid"] for worker in stats}) == 2
+        assert all(worker["load_time"] >= 0 for worker in stats)
+        assert all(worker["rss_mb"] > 0 for worker in stats)
+    finally:
+        model.shutdown()
@@ -0,0 +1,146 @@
+import os
+import uuid
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+from PIL import Image
+
+from contextly.models.media import Media
+from contextly.routers import static
+from contextly.utils.hls import MASTER_PLAYLIST, Rendition, master_playlist
+from contextly.utils.thumbnails import ThumbnailCache, negotiate_format
+
+
+@pytest.mark.anyio
+async def test_static_video(client: AsyncClient, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    id = uuid.uuid4()
+    path = Path(f"downloads/{id}/video/{id}.mp4")
+    path.parent.mkdir(parents=True)
+    path.write_bytes(bytes(range(256)) * 4)
+
+    response = await client.get(f"/static/video/{id}")
+    assert response.status_code == 200
+    assert len(response.content) == 1024
+    assert "immutable" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+    last_modified = response.headers["last-modified"]
+
+    response = await client.get(f"/static/video/{id}", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == bytes(range(10, 20))
+    assert response.headers["content-range"] == "bytes 10-19/1024"
+
+    response = await client.get(f"/static/video/{id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    headers = {"If-Modified-Since": last_modified}
+    response = await client.get(f"/static/video/{id}", headers=headers)
+    assert response.status_code == 304
+    headers = {"If-None-Match": '"other"', "If-Modified-Since": last_modified}
+    response = await client.get(f"/static/video/{id}", headers=headers)
+    assert response.status_code == 200
+
+    response = await client.head(f"/static/video/{id}")
+    assert response.status_code == 200
+    assert response.headers["content-length"] == "1024"
+    response = await client.get(f"/static/video/{uuid.uuid4()}")
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_static_hls(client: AsyncClient, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    id = uuid.uuid4()
+    root = Path(f"downloads/{id}/hls")
+    (root / "source").mkdir(parents=True)
+    renditions = [Rendition("source", 5_000_000, 1920, 1080)]
+    (root / MASTER_PLAYLIST).write_text(master_playlist(renditions))
+    (root / "source/00000.m4s").write_bytes(b"segment")
+
+    response = await client.get(f"/static/hls/{id}/{MASTER_PLAYLIST}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apple.mpegurl"
+    assert "BANDWIDTH=5000000,RESOLUTION=1920x1080\nsource/index.m3u8" in response.text
+    response = await client.get(f"/static/hls/{id}/source/00000.m4s")
+    assert response.content == b"segment"
+    assert "immutable" in response.headers["cache-control"]
+
+    for path in ["source/..%2F..%2Fhls.tmp/master.m3u8", "source/00001.m4s", "x.py"]:
+        response = await client.get(f"/static/hls/{id}/{path}")
+        assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_static_audio(client: AsyncClient, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    media = await Media.create(source_id="audio", url="audio", audio_chunks=3)
+    audio_dir = Path(f"downloads/{media.id}/audio")
+    audio_dir.mkdir(parents=True)
+    for i in range(2):
+        (audio_dir / f"{i}.mp3").write_bytes(b"chunk")
+    (audio_dir / f"{media.id}.m4a.part").write_bytes(b"partial")
+
+    response = await client.get(f"/static/audio/{media.id}")
+    assert response.status_code == 404
+
+    (audio_dir / f"{media.id}.m4a").write_bytes(b"stream")
+    response = await client.get(f"/static/audio/{media.id}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/mp4"
+    assert response.content == b"stream"
+
+
+@pytest.mark.anyio
+async def test_static_thumbnail(client: AsyncClient, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(static, "thumbnail_cache", ThumbnailCache("cache", 10**6))
+    id = uuid.uuid4()
+    path = Path(f"downloads/{id}/img/{id}.jpg")
+    path.parent.mkdir(parents=True)
+    Image.new("RGB", (1280, 720), "red").save(path)
+
+    response = await client.get(f"/static/thumbnail/{id}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+
+    headers = {"Accept": "image/webp,image/*;q=0.8"}
+    response = await client.get(f"/static/thumbnail/{id}?size=card", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["vary"] == "Accept"
+    etag = response.headers["etag"]
+    with Image.open(BytesIO(response.content)) as image:
+        assert image.size == (320, 180)
+    headers["If-None-Match"] = etag
+    response = await client.get(f"/static/thumbnail/{id}?size=card", headers=headers)
+    assert response.status_code == 304
+
+    response = await client.get(f"/static/thumbnail/{id}?size=card")
+    assert response.headers["content-type"] == "image/jpeg"
+    assert sorted(os.listdir("cache")) == [f"{id}-card.jpg", f"{id}-card.webp"]
+    response = await client.get(f"/static/thumbnail/{id}?size=huge")
+    assert response.status_code == 404
+
+
+def test_thumbnail_cache_eviction(tmp_path):
+    cache = ThumbnailCache(str(tmp_path), 10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    assert cache.get("a") is not None
+    cache.put("c", b"1234")
+    assert cache.get("b") is None
+    assert sorted(os.listdir(tmp_path)) == ["a", "c"]
+    assert ThumbnailCache(str(tmp_path), 10).get("c") is not None
+
+
+def test_negotiate_format():
+    assert negotiate_format(None) == "image/jpeg"
+    assert negotiate_format("*/*") == "image/jpeg"
+    assert negotiate_format("image/webp;q=0, image/*") == "image/jpeg"
+    assert negotiate_format("image/avif,image/webp,*/*;q=0.8") in (
+        "image/avif",
+        "image/webp",
+    )
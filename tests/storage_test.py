@@ -0,0 +1,116 @@
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+
+from contextly.routers import static
+from contextly.utils.storage import LocalStorage, S3Storage
+
+
+@pytest.fixture(scope="module")
+def s3_endpoint():
+    """
+    S3-compatible endpoint for the tests: a MinIO server from `S3_TEST_ENDPOINT_URL`,
+    e.g. `docker run -p 9000:9000 minio/minio server /data`, or a local moto server.
+    """
+
+    endpoint_url = os.getenv("S3_TEST_ENDPOINT_URL")
+    if endpoint_url:
+        yield endpoint_url
+        return
+    server = pytest.importorskip("moto.server").ThreadedMotoServer(
+        ip_address="127.0.0.1", port=0, verbose=False
+    )
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f"http://{host}:{port}"
+    server.stop()
+
+
+def create_s3_storage(root: Path, endpoint_url: str, bucket: str) -> S3Storage:
+    storage = S3Storage(
+        str(root),
+        bucket,
+        endpoint_url=endpoint_url,
+        region="us-east-1",
+        access_key=os.getenv("S3_TEST_ACCESS_KEY", "minioadmin"),
+        secret_key=os.getenv("S3_TEST_SECRET_KEY", "minioadmin"),
+        part_size=5 * 2**20,
+    )
+    if bucket not in [b["Name"] for b in storage.client.list_buckets()["Buckets"]]:
+        storage.client.create_bucket(Bucket=bucket)
+    return storage
+
+
+@pytest.mark.anyio
+async def test_local_storage(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    id = uuid.uuid4()
+    path = Path(storage.local_path(f"{id}/audio/0.mp3"))
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"chunk")
+    await storage.upload_dir(f"{id}/audio")
+
+    assert await storage.list(str(id)) == [f"{id}/audio/0.mp3"]
+    assert await storage.exists(f"{id}/audio/0.mp3")
+    assert await storage.fetch(f"{id}/audio/0.mp3") == str(path)
+    assert await storage.fetch(f"{id}/audio/1.mp3") is None
+    await storage.delete(str(id))
+    assert await storage.list(str(id)) == []
+
+
+@pytest.mark.anyio
+async def test_s3_storage(tmp_path, s3_endpoint):
+    bucket = f"contextly-test-{uuid.uuid4().hex[:8]}"
+    storage = create_s3_storage(tmp_path / "api", s3_endpoint, bucket)
+    id = uuid.uuid4()
+    data = os.urandom(6 * 2**20)  # two multipart upload parts
+    path = Path(storage.local_path(f"{id}/video/{id}.mp4"))
+    path.parent.mkdir(parents=True)
+    path.write_bytes(data)
+    await storage.upload(f"{id}/video/{id}.mp4")
+
+    worker = create_s3_storage(tmp_path / "worker", s3_endpoint, bucket)
+    assert await worker.list(str(id)) == [f"{id}/video/{id}.mp4"]
+    assert await worker.exists(f"{id}/video/{id}.mp4")
+    assert not await worker.exists(f"{id}/video/other.mp4")
+    fetched = await worker.fetch(f"{id}/video/{id}.mp4")
+    assert fetched.startswith(str(tmp_path / "worker"))
+    assert Path(fetched).read_bytes() == data
+    assert await worker.fetch(f"{id}/video/other.mp4") is None
+
+    await worker.delete(str(id))
+    assert await storage.list(str(id)) == []
+    assert not Path(fetched).exists()
+
+
+@pytest.mark.anyio
+async def test_s3_static_video(client: AsyncClient, tmp_path, monkeypatch, s3_endpoint):
+    storage = create_s3_storage(tmp_path, s3_endpoint, "contextly-static")
+    monkeypatch.setattr(static, "storage", storage)
+    id = uuid.uuid4()
+    path = Path(storage.local_path(f"{id}/video/{id}.mp4"))
+    path.parent.mkdir(parents=True)
+    path.write_bytes(bytes(range(256)) * 4)
+    await storage.upload(f"{id}/video/{id}.mp4")
+
+    monkeypatch.setattr(static, "S3_PRESIGN", False)
+    response = await client.get(f"/static/video/{id}", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == bytes(range(10, 20))
+    assert response.headers["content-range"] == "bytes 10-19/1024"
+    assert response.headers["content-type"] == "video/mp4"
+    etag = response.headers["etag"]
+    response = await client.get(f"/static/video/{id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    response = await client.head(f"/static/video/{id}")
+    assert response.headers["content-length"] == "1024"
+    response = await client.get(f"/static/video/{uuid.uuid4()}")
+    assert response.status_code == 404
+
+    monkeypatch.setattr(static, "S3_PRESIGN", True)
+    response = await client.get(f"/static/video/{id}")
+    assert response.status_code == 307
+    assert f"/contextly-static/{id}/video/{id}.mp4" in response.headers["location"]
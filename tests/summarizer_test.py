@@ -0,0 +1,97 @@
+from typing import List
+
+from contextly.utils.summarizer import Summarizer
+
+
+class FakeTokenizer:
+    """
+    Word-level tokenizer: every distinct word is one token.
+    """
+
+    def __init__(self):
+        self.vocab = {"": 0}
+        self.words = [""]
+
+    def encode(self, text: str) -> List[int]:
+        for word in text.split():
+            if word not in self.vocab:
+                self.vocab[word] = len(self.words)
+                self.words.append(word)
+        return [self.vocab[word] for word in text.split()]
+
+    def __call__(self, texts, **kwargs):
+        if isinstance(texts, str):
+            return {"input_ids": self.encode(texts)}
+        return {"input_ids": [self.encode(text) for text in texts]}
+
+    def pad(self, inputs, return_tensors=None):
+        length = max(map(len, inputs["input_ids"]))
+        return {
+            "input_ids": [
+                ids + [0] * (length - len(ids)) for ids in inputs["input_ids"]
+            ],
+            "attention_mask": [
+                [1] * len(ids) + [0] * (length - len(ids))
+                for ids in inputs["input_ids"]
+            ],
+        }
+
+    def decode(self, ids, skip_special_tokens=False):
+        return " ".join(self.words[i] for i in ids if i)
+
+    def batch_decode(self, batch, skip_special_tokens=False):
+        return [self.decode(ids) for ids in batch]
+
+
+class FakeModel:
+    """
+    Summarizes a text to its first word and records the generate batches.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def generate(self, input_ids, attention_mask, **kwargs):
+        self.batches.append(input_ids)
+        return [ids[:1] for ids in input_ids]
+
+
+def fake_summarizer(**kwargs) -> Summarizer:
+    summarizer = Summarizer(**kwargs)
+    summarizer.tokenizer = FakeTokenizer()
+    summarizer.model = FakeModel()
+    return summarizer
+
+
+def test_summarize_chunks_batches():
+    summarizer = fake_summarizer(batch_size=2)
+    chunks = ["a b c d", "e", "f g", "h i j", "k l m n o"]
+    assert summarizer.summarize_chunks(chunks) == ["a", "e", "f", "h", "k"]
+    batches = summarizer.model.batches
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    # chunks are sorted by length, so each batch is padded to similar lengths
+    assert [len(batch[0]) for batch in batches] == [2, 4, 5]
+
+
+def test_hierarchical_summary():
+    summarizer = fake_summarizer(mode="hierarchical", target_tokens=2)
+    summarizer.max_chunk_tokens = 4
+    text = " ".join(f"s{i}a s{i}b." for i in range(12))
+    # level 0: 6 chunks of two sentences, level 1: 6 words cut into 2 chunks
+    assert summarizer._get_summary(text) == "s0a s8a"
+    assert [len(batch) for batch in summarizer.model.batches] == [6, 2]
+
+
+def test_summary_under_lock():
+    summarizer = fake_summarizer(mode="hierarchical", target_tokens=2)
+    calls = []
+
+    class LockedTokenizer(FakeTokenizer):
+        def __call__(self, texts, **kwargs):
+            calls.append(summarizer.lock.locked())
+            return super().__call__(texts, **kwargs)
+
+    summarizer.tokenizer = LockedTokenizer()
+    assert summarizer._get_summary("a b. c d.") == "a"
+    # the tokenizer changes its settings on calls, so jobs don't share it unlocked
+    assert calls and all(calls)
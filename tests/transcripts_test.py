@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+from contextly.utils.transcripts import (decode_block, encode_block, to_srt,
+                                         to_vtt)
+
+SEGMENTS = [
+    {"start": 0.0, "end": 2.5, "text": " Привет."},
+    {"start": 3661.25, "end": 3662.0, "text": " Пока."},
+]
+
+
+def test_block_roundtrip():
+    for compression in ["none", "zstd"]:
+        data = encode_block(SEGMENTS, compression)
+        block = SimpleNamespace(data=data, compression=compression)
+        assert decode_block(block) == SEGMENTS
+
+
+def test_subtitles():
+    assert to_vtt(SEGMENTS) == (
+        "WEBVTT\n\n"
+        "00:00:00.000 --> 00:00:02.500\nПривет.\n\n"
+        "01:01:01.250 --> 01:01:02.000\nПока.\n"
+    )
+    assert to_srt(SEGMENTS) == (
+        "1\n00:00:00,000 --> 00:00:02,500\nПривет.\n\n"
+        "2\n01:01:01,250 --> 01:01:02,000\nПока.\n"
+    )
@@ -0,0 +1,58 @@
+import queue
+
+import numpy as np
+
+from contextly.utils.audio import SAMPLE_RATE, PcmChunk
+from contextly.utils.transcriber import Transcriber
+from contextly.utils.vad import find_speech
+
+
+def tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_find_speech(tmp_path):
+    audio = np.concatenate(
+        [silence(1), tone(0.03), silence(10), tone(2), silence(1), tone(1), silence(5)]
+    )
+    path = tmp_path / "audio.f32"
+    audio.tofile(path)
+    start = 5 * SAMPLE_RATE  # the second chunk, the click at 1 s is in the first
+    chunk = PcmChunk(str(path), start, len(audio) - start)
+
+    speech = find_speech(chunk, threshold_db=-45, min_silence=2, padding=0.3)
+    assert len(speech.windows) == 1  # the pause is shorter than `min_silence`
+    window = speech.windows[0]
+    assert abs((window.start - start) / SAMPLE_RATE - 5.73) < 0.05
+    assert abs(window.frames / SAMPLE_RATE - 4.62) < 0.05
+    assert speech.speech_frames == window.frames
+
+    class FakeModel:
+        def transcribe(self, audio):
+            duration = len(audio) / SAMPLE_RATE
+            return {"segments": [{"start": 0.3, "end": duration, "text": " tone"}]}
+
+    transcriber = Transcriber.__new__(Transcriber)
+    transcriber.models = queue.Queue()
+    transcriber.models.put(FakeModel())
+    assert transcriber._transcribe_chunk(speech, 600) == [
+        {"start": 606.03, "end": 610.35, "text": " tone"}
+    ]
+
+
+def test_speech_regions_packed(tmp_path):
+    # a lecture with a pause every 3 s: 40 regions in 200 s
+    audio = np.concatenate([np.concatenate([tone(2), silence(3)])] * 40)
+    path = tmp_path / "audio.f32"
+    audio.tofile(path)
+    chunk = PcmChunk(str(path), 0, len(audio))
+
+    speech = find_speech(chunk, threshold_db=-45, min_silence=2, padding=0.3)
+    assert len(speech.windows) == 7  # up to 30 s each, not one per region
+    assert all(window.frames <= 30 * SAMPLE_RATE for window in speech.windows)
+    assert len(find_speech(chunk, window=0, min_silence=2).windows) == 40
@@ -0,0 +1,75 @@
+import re
+from datetime import timedelta
+
+import pytest
+from httpx import AsyncClient
+from tortoise import timezone
+
+from contextly.models.media import Media
+from contextly.models.user import User
+from contextly.models.video import Video
+from contextly.routers import video as video_router
+from contextly.utils.auth import create_access_token
+
+
+async def login(username: str) -> dict:
+    """
+    Create a user and get the headers of its session.
+    """
+
+    user = await User.create(
+        username=username, email=f"{username}@test.ru", hashed_password=""
+    )
+    token = create_access_token({"sub": user.email})
+    return {"user": user, "headers": {"Cookie": f"session={token}"}}
+
+
+def video_ids(html: str) -> list:
+    return re.findall(r'href="/video/download_list/([0-9a-f-]+)"', html)
+
+
+@pytest.mark.anyio
+async def test_video_list_cursor(client: AsyncClient, monkeypatch):
+    session = await login("cursor")
+    monkeypatch.setattr(video_router, "VIDEO_PAGE_SIZE", 2)
+    now = timezone.now()
+    videos = []
+    for i, created_at in enumerate([now, now, now - timedelta(1)]):
+        media = await Media.create(source_id=f"cursor-{i}", url=f"cursor-{i}")
+        video = await Video.create(user=session["user"], media=media, url=media.url)
+        await Video.filter(id=video.id).update(created_at=created_at)
+        videos.append(video)
+    # newest first, and equal `created_at` ordered by id
+    expected = [str(v.id) for v in sorted(videos[:2], key=lambda v: v.id)][::-1]
+    expected.append(str(videos[2].id))
+
+    response = await client.get("/video/download_list", headers=session["headers"])
+    assert response.status_code == 200
+    assert video_ids(response.text) == expected[:2]
+    cursor = re.search(r"cursor=([^\"]+)\"", response.text).group(1)
+
+    response = await client.get(
+        f"/video/download_list?cursor={cursor}", headers=session["headers"]
+    )
+    assert video_ids(response.text) == expected[2:]
+    assert "cursor=" not in response.text
+
+    response = await client.get(
+        "/video/download_list?cursor=bad", headers=session["headers"]
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_video_page(client: AsyncClient):
+    session = await login("page")
+    media = await Media.create(
+        source_id="page", url="page", audio_seconds=600, speech_seconds=450
+    )
+    video = await Video.create(user=session["user"], media=media, url=media.url)
+
+    response = await client.get(
+        f"/video/download_list/{video.id}", headers=session["headers"]
+    )
+    assert response.status_code == 200
+    assert "silence skipped: 150 of 600 s" in response.text